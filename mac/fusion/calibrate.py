@@ -0,0 +1,50 @@
+import sys
+from typing import List, Tuple
+
+import cv2
+import numpy as np
+
+from .floor import compute_homography, project
+
+
+def calibrate_floor(frame: np.ndarray, stream_id: str) -> None:
+    # Click floor marks in the camera image, then type their floor coordinates (e.g. metres from a corner).
+    import yaml
+
+    points: List[Tuple[float, float]] = []
+
+    def on_click(event, x, y, flags, param) -> None:
+        if event == cv2.EVENT_LBUTTONDOWN:
+            points.append((float(x), float(y)))
+
+    window = f"calibrate-{stream_id}"
+    cv2.namedWindow(window)
+    cv2.setMouseCallback(window, on_click)
+    print("calibrate: click at least 4 floor marks, u=undo, enter=done, q=abort")
+    try:
+        while True:
+            view = frame.copy()
+            for i, (x, y) in enumerate(points):
+                cv2.circle(view, (int(x), int(y)), 5, (0, 0, 255), -1)
+                cv2.putText(view, str(i + 1), (int(x) + 8, int(y) - 8), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
+            cv2.imshow(window, view)
+            key = cv2.waitKey(20) & 0xFF
+            if key == ord("q"):
+                return
+            if key == ord("u") and points:
+                points.pop()
+            if key in (13, 10) and len(points) >= 4:
+                break
+    finally:
+        cv2.destroyWindow(window)
+
+    floor: List[Tuple[float, float]] = []
+    for i, (x, y) in enumerate(points):
+        fx, fy = input(f"calibrate: floor x y for point {i + 1} at ({x:.0f}, {y:.0f}): ").split()
+        floor.append((float(fx), float(fy)))
+
+    h = compute_homography(points, floor)
+    error = np.linalg.norm(project(h, np.array(points)) - np.array(floor), axis=1)
+    print(f"calibrate: reprojection error mean={error.mean():.3f} max={error.max():.3f} (floor units)")
+    snippet = {"fusion": {"floor": {"cameras": {stream_id: {"homography": np.round(h, 8).tolist()}}}}}
+    yaml.safe_dump(snippet, sys.stdout, sort_keys=False, default_flow_style=None)
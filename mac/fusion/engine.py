@@ -1,8 +1,13 @@
-from dataclasses import dataclass
-from typing import Dict, List
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Union
+
+import numpy as np
 
 from .features import GlobalFeatures
-from vision.types import PersonState
+from .floor import FloorConfig, FloorMerger, parse_floor_config
+from .heatmap import HeatmapConfig, OccupancyMap, parse_heatmap_config
+from vision.types import PersonBatch, PersonState
 
 
 @dataclass
@@ -12,47 +17,93 @@ class FusionConfig:
     velocity_fast: float = 60.0
     max_energy: float = 10.0
     ema_alpha: float = 0.3
+    heatmap: HeatmapConfig = field(default_factory=HeatmapConfig)
+    floor: FloorConfig = field(default_factory=FloorConfig)
 
 
 class FeatureFusion:
     def __init__(self, config: dict):
-        self.cfg = FusionConfig(
+        self._heatmap: Optional[OccupancyMap] = None
+        self._floor: Optional[FloorMerger] = None
+        self.reconfigure(config)
+        self._last = GlobalFeatures()
+
+    @staticmethod
+    def parse_config(config: dict) -> FusionConfig:
+        return FusionConfig(
             velocity_slow=float(config.get("velocity_slow", 10.0)),
             velocity_medium=float(config.get("velocity_medium", 30.0)),
             velocity_fast=float(config.get("velocity_fast", 60.0)),
             max_energy=float(config.get("max_energy", 10.0)),
             ema_alpha=float(config.get("ema_alpha", 0.3)),
+            heatmap=parse_heatmap_config(config.get("heatmap", {}) or {}),
+            floor=parse_floor_config(config.get("floor", {}) or {}),
         )
-        self._last = GlobalFeatures()
 
-    def update(self, vision_results: Dict[str, List[PersonState]]) -> GlobalFeatures:
-        people: List[PersonState] = []
-        for states in vision_results.values():
-            people.extend(states)
+    def reconfigure(self, config: dict) -> None:
+        cfg = self.parse_config(config)
+        self._edges = np.array([cfg.velocity_slow, cfg.velocity_medium, cfg.velocity_fast], dtype=np.float32)
+        if not cfg.heatmap.enabled:
+            self._heatmap = None
+        elif self._heatmap is None:
+            self._heatmap = OccupancyMap(cfg.heatmap)
+        else:
+            self._heatmap.reconfigure(cfg.heatmap)
+        self._floor = FloorMerger(cfg.floor) if len(cfg.floor.homographies) >= 2 else None
+        self.cfg = cfg
 
-        total = len(people)
-        if total == 0:
-            return self._smooth(GlobalFeatures())
+    @property
+    def heatmap(self) -> Optional[OccupancyMap]:
+        return self._heatmap
 
-        movement_energy = sum(p.velocity for p in people)
-        stationary_count = sum(1 for p in people if p.stationary)
-        phone_count = sum(1 for p in people if p.has_phone)
+    @property
+    def merged_count(self) -> int:
+        # People dropped as cross-camera duplicates in the last update.
+        return self._floor.last_merged if self._floor else 0
 
-        slow = sum(1 for p in people if (p.velocity >= self.cfg.velocity_slow and p.velocity < self.cfg.velocity_medium))
-        medium = sum(1 for p in people if (p.velocity >= self.cfg.velocity_medium and p.velocity < self.cfg.velocity_fast))
-        fast = sum(1 for p in people if p.velocity >= self.cfg.velocity_fast)
+    def update(
+        self,
+        vision_results: Union[PersonBatch, Dict[str, List[PersonState]]],
+        now: Optional[float] = None,
+    ) -> GlobalFeatures:
+        batch = vision_results if isinstance(vision_results, PersonBatch) else PersonBatch.from_states(vision_results)
+        # The heatmap is per camera, so it sees every view; counts use one entry per person.
+        spatial = self._heatmap.update(batch, now or time.time()) if self._heatmap else None
+        if self._floor:
+            batch = self._floor.merge(batch)
+
+        total = len(batch)
+        if total == 0:
+            features = GlobalFeatures()
+            self._apply_spatial(features, spatial)
+            return self._smooth(features)
+
+        # Buckets: 0 below slow, 1 slow, 2 medium, 3 fast.
+        bucket = np.searchsorted(self._edges, batch.velocity, side="right")
+        counts = np.bincount(bucket, minlength=4)
 
         features = GlobalFeatures(
             total_people=total,
-            movement_energy=min(movement_energy, self.cfg.max_energy),
-            stationary_ratio=stationary_count / total,
-            phone_ratio=phone_count / total,
-            slow_count=slow,
-            medium_count=medium,
-            fast_count=fast,
+            movement_energy=min(float(batch.velocity.sum()), self.cfg.max_energy),
+            stationary_ratio=float(np.count_nonzero(batch.stationary)) / total,
+            phone_ratio=float(np.count_nonzero(batch.has_phone)) / total,
+            slow_count=int(counts[1]),
+            medium_count=int(counts[2]),
+            fast_count=int(counts[3]),
         )
+        self._apply_spatial(features, spatial)
         return self._smooth(features)
 
+    @staticmethod
+    def _apply_spatial(features: GlobalFeatures, spatial) -> None:
+        # The occupancy map already decays over time, so these bypass the EMA below.
+        if spatial is None:
+            return
+        features.spatial_spread = spatial.spatial_spread
+        features.hotspot_x = spatial.hotspot_x
+        features.hotspot_y = spatial.hotspot_y
+        features.zone_occupancy = spatial.zone_occupancy
+
     def _smooth(self, current: GlobalFeatures) -> GlobalFeatures:
         a = self.cfg.ema_alpha
         last = self._last
@@ -65,6 +116,10 @@ class FeatureFusion:
             slow_count=current.slow_count,
             medium_count=current.medium_count,
             fast_count=current.fast_count,
+            spatial_spread=current.spatial_spread,
+            hotspot_x=current.hotspot_x,
+            hotspot_y=current.hotspot_y,
+            zone_occupancy=current.zone_occupancy,
         )
         self._last = smoothed
         return smoothed
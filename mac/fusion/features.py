@@ -1,4 +1,5 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import Dict
 
 
 @dataclass
@@ -10,3 +11,7 @@ class GlobalFeatures:
     slow_count: int = 0
     medium_count: int = 0
     fast_count: int = 0
+    spatial_spread: float = 0.0
+    hotspot_x: float = 0.0
+    hotspot_y: float = 0.0
+    zone_occupancy: Dict[str, float] = field(default_factory=dict)
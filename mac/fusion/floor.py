@@ -0,0 +1,203 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Sequence, Set, Tuple
+
+import numpy as np
+
+from vision.types import PersonBatch
+
+
+def compute_homography(image_points: Sequence[Sequence[float]], floor_points: Sequence[Sequence[float]]) -> np.ndarray:
+    # Direct linear transform (least squares for more than four points).
+    src = np.asarray(image_points, dtype=np.float64)
+    dst = np.asarray(floor_points, dtype=np.float64)
+    if src.shape != dst.shape or src.ndim != 2 or src.shape[1] != 2 or len(src) < 4:
+        raise ValueError("homography needs at least 4 matching (x, y) image and floor points")
+
+    def normalize(pts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        mean = pts.mean(axis=0)
+        scale = np.sqrt(2.0) / max(np.linalg.norm(pts - mean, axis=1).mean(), 1e-9)
+        t = np.array([[scale, 0, -scale * mean[0]], [0, scale, -scale * mean[1]], [0, 0, 1]])
+        return (pts - mean) * scale, t
+
+    s, ts = normalize(src)
+    d, td = normalize(dst)
+    n = len(s)
+    a = np.zeros((2 * n, 9))
+    a[0::2, 0:2] = s
+    a[0::2, 2] = 1
+    a[0::2, 6:8] = -d[:, :1] * s
+    a[0::2, 8] = -d[:, 0]
+    a[1::2, 3:5] = s
+    a[1::2, 5] = 1
+    a[1::2, 6:8] = -d[:, 1:] * s
+    a[1::2, 8] = -d[:, 1]
+    _, sv, vt = np.linalg.svd(a)
+    if sv[-2] < 1e-9:
+        raise ValueError("degenerate calibration points (collinear?)")
+    h = np.linalg.inv(td) @ vt[-1].reshape(3, 3) @ ts
+    return h / h[2, 2]
+
+
+def project(h: np.ndarray, points: np.ndarray) -> np.ndarray:
+    pts = np.asarray(points, dtype=np.float64)
+    out = pts @ h[:, :2].T + h[:, 2]
+    return out[:, :2] / out[:, 2:3]
+
+
+@dataclass
+class FloorConfig:
+    merge_distance: float = 0.6
+    merge_time_s: float = 0.5
+    homographies: Dict[str, np.ndarray] = field(default_factory=dict)
+
+
+def parse_floor_config(config: dict) -> FloorConfig:
+    homographies: Dict[str, np.ndarray] = {}
+    for stream_id, cam in (config.get("cameras") or {}).items():
+        if "homography" in cam:
+            h = np.asarray(cam["homography"], dtype=np.float64)
+            if h.shape != (3, 3):
+                raise ValueError(f"floor camera {stream_id}: homography must be 3x3")
+        else:
+            h = compute_homography(cam["image_points"], cam["floor_points"])
+        homographies[str(stream_id)] = h
+    cfg = FloorConfig(
+        merge_distance=float(config.get("merge_distance", 0.6)),
+        merge_time_s=float(config.get("merge_time_s", 0.5)),
+        homographies=homographies,
+    )
+    if cfg.merge_distance <= 0:
+        raise ValueError("floor.merge_distance must be positive")
+    return cfg
+
+
+# Half of the 3x3 neighbourhood: each unordered pair of cells is visited once.
+_NEIGHBOURS = np.array([(0, 0), (1, -1), (1, 0), (1, 1), (0, 1)], dtype=np.int64)
+
+
+class FloorMerger:
+    # Projects people to the shared floor and merges tracks seen by more than one camera.
+    def __init__(self, cfg: FloorConfig):
+        self.cfg = cfg
+        self.last_merged = 0
+
+    def floor_positions(self, batch: PersonBatch) -> Tuple[np.ndarray, np.ndarray]:
+        # Returns (N, 2) floor coordinates and a mask of people whose camera is calibrated. The point
+        # projected is where the box meets the floor (x, foot_y): a ray through the box centre, at about
+        # waist height, hits the floor plane well beyond the person.
+        hs = np.full((len(batch.streams), 3, 3), np.nan)
+        for i, name in enumerate(batch.streams):
+            h = self.cfg.homographies.get(name)
+            if h is not None:
+                hs[i] = h
+        h = hs[batch.stream]
+        pts = np.stack([batch.x, batch.foot_y, np.ones(len(batch), dtype=np.float32)], axis=1).astype(np.float64)
+        out = np.einsum("nij,nj->ni", h, pts)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            floor = out[:, :2] / out[:, 2:3]
+        calibrated = np.isfinite(floor).all(axis=1)
+        return floor, calibrated
+
+    def merge(self, batch: PersonBatch) -> PersonBatch:
+        self.last_merged = 0
+        if len(batch) < 2 or len(self.cfg.homographies) < 2:
+            return batch
+
+        floor, calibrated = self.floor_positions(batch)
+        idx = np.flatnonzero(calibrated)
+        if len(idx) < 2:
+            return batch
+
+        i, j = self._candidate_pairs(floor[idx])
+        i, j = idx[i], idx[j]
+        d = self.cfg.merge_distance
+        dist2 = ((floor[i] - floor[j]) ** 2).sum(axis=1)
+        keep = (
+            (batch.stream[i] != batch.stream[j])
+            & (np.abs(batch.last_seen[i] - batch.last_seen[j]) <= self.cfg.merge_time_s)
+            & (dist2 <= d * d)
+        )
+        i, j, dist2 = i[keep], j[keep], dist2[keep]
+        if len(i) == 0:
+            return batch
+
+        labels = self._group(floor, batch.stream, i, j, dist2)
+
+        # One survivor per group: the most recently seen member; a phone seen by any camera counts.
+        order = np.lexsort((-batch.last_seen, labels))
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = labels[order][1:] != labels[order][:-1]
+        survivors = order[first]
+        phone = np.zeros(len(batch), dtype=bool)
+        np.logical_or.at(phone, labels, batch.has_phone)
+
+        merged = batch.select(survivors)
+        merged.has_phone = phone[labels[survivors]]
+        self.last_merged = len(batch) - len(merged)
+        return merged
+
+    def _group(
+        self, floor: np.ndarray, stream: np.ndarray, i: np.ndarray, j: np.ndarray, dist2: np.ndarray
+    ) -> np.ndarray:
+        # Greedy union, closest pairs first. A group never holds two people from one camera (a camera
+        # sees them as different people) and never spans more than merge_distance, so chains cannot form.
+        limit = self.cfg.merge_distance ** 2
+        labels = np.arange(len(stream))
+        members: Dict[int, List[int]] = {}
+        cams: Dict[int, Set[int]] = {}
+        stream_of = stream.tolist()
+        order = np.argsort(dist2, kind="stable")
+        for a, b in zip(i[order].tolist(), j[order].tolist()):
+            ra, rb = int(labels[a]), int(labels[b])
+            if ra == rb:
+                continue
+            ga = members.get(ra, [ra])
+            gb = members.get(rb, [rb])
+            ca = cams.get(ra, {stream_of[ra]})
+            cb = cams.get(rb, {stream_of[rb]})
+            if ca & cb:
+                continue
+            if len(ga) + len(gb) > 2:
+                pa, pb = floor[ga], floor[gb]
+                if ((pa[:, None, :] - pb[None, :, :]) ** 2).sum(axis=2).max() > limit:
+                    continue
+            root, other = min(ra, rb), max(ra, rb)
+            group = ga + gb
+            labels[group] = root
+            members[root] = group
+            cams[root] = ca | cb
+            members.pop(other, None)
+            cams.pop(other, None)
+        return labels
+
+    def _candidate_pairs(self, floor: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        # Uniform grid with cell size = merge distance; neighbours are found by binary search on sorted cell keys.
+        cells = np.floor(floor / self.cfg.merge_distance).astype(np.int64)
+        cells -= cells.min(axis=0) - 1
+        width = int(cells[:, 1].max()) + 3
+        keys = cells[:, 0] * width + cells[:, 1]
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+
+        pairs_i = []
+        pairs_j = []
+        for dx, dy in _NEIGHBOURS:
+            target = keys + dx * width + dy
+            lo = np.searchsorted(sorted_keys, target, side="left")
+            hi = np.searchsorted(sorted_keys, target, side="right")
+            counts = hi - lo
+            total = int(counts.sum())
+            if total == 0:
+                continue
+            src = np.repeat(np.arange(len(keys)), counts)
+            offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+            dst = order[np.repeat(lo, counts) + offsets]
+            if dx == 0 and dy == 0:
+                same = src < dst
+                src, dst = src[same], dst[same]
+            pairs_i.append(src)
+            pairs_j.append(dst)
+        if not pairs_i:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty
+        return np.concatenate(pairs_i), np.concatenate(pairs_j)
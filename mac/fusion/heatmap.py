@@ -0,0 +1,187 @@
+import math
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from vision.types import PersonBatch
+
+
+@dataclass
+class Zone:
+    name: str
+    rect: Tuple[float, float, float, float]  # normalized x0, y0, x1, y1
+    streams: List[str]  # cameras whose frames the rect is drawn in
+
+
+@dataclass
+class HeatmapConfig:
+    enabled: bool = True
+    grid_w: int = 32
+    grid_h: int = 18
+    frame_w: float = 1280.0
+    frame_h: float = 720.0
+    decay_s: float = 5.0
+    # Camera whose frame the hotspot is reported in; may be omitted when only one camera feeds the map.
+    hotspot_stream: Optional[str] = None
+    zones: List[Zone] = field(default_factory=list)
+
+
+@dataclass
+class HeatmapFeatures:
+    spatial_spread: float = 0.0
+    hotspot_x: float = 0.0
+    hotspot_y: float = 0.0
+    zone_occupancy: Dict[str, float] = field(default_factory=dict)
+
+
+def parse_heatmap_config(config: dict) -> HeatmapConfig:
+    grid = config.get("grid", [32, 18])
+    frame = config.get("frame_size", [1280, 720])
+    zones: List[Zone] = []
+    for z in config.get("zones", []) or []:
+        rect = tuple(float(v) for v in z["rect"])
+        if len(rect) != 4 or rect[0] >= rect[2] or rect[1] >= rect[3]:
+            raise ValueError(f"heatmap zone {z.get('name')}: rect must be [x0, y0, x1, y1] with x0<x1, y0<y1")
+        # Each camera has its own image coordinates and views may overlap, so a zone names its cameras.
+        streams = z.get("streams")
+        if not streams:
+            raise ValueError(f"heatmap zone {z.get('name')}: streams must list the camera(s) the rect applies to")
+        zones.append(Zone(name=str(z["name"]), rect=rect, streams=[str(s) for s in streams]))
+    cfg = HeatmapConfig(
+        enabled=bool(config.get("enabled", True)),
+        grid_w=int(grid[0]),
+        grid_h=int(grid[1]),
+        frame_w=float(frame[0]),
+        frame_h=float(frame[1]),
+        decay_s=float(config.get("decay_s", 5.0)),
+        hotspot_stream=str(config["hotspot_stream"]) if config.get("hotspot_stream") else None,
+        zones=zones,
+    )
+    if cfg.grid_w <= 0 or cfg.grid_h <= 0 or cfg.frame_w <= 0 or cfg.frame_h <= 0 or cfg.decay_s <= 0:
+        raise ValueError("heatmap grid, frame_size and decay_s must be positive")
+    return cfg
+
+
+class OccupancyMap:
+    # One decaying occupancy grid per camera, stacked as (cameras, grid_h, grid_w).
+    def __init__(self, cfg: HeatmapConfig):
+        self._reset(cfg)
+
+    def _reset(self, cfg: HeatmapConfig) -> None:
+        self.cfg = cfg
+        self._slots: Dict[str, int] = {}
+        self._grids = np.zeros((0, cfg.grid_h, cfg.grid_w), dtype=np.float32)
+        self._last_update: Optional[float] = None
+        self._last_occupied: Optional[float] = None
+        self._xs = (np.arange(cfg.grid_w, dtype=np.float32) + 0.5) / cfg.grid_w
+        self._ys = (np.arange(cfg.grid_h, dtype=np.float32) + 0.5) / cfg.grid_h
+        self._zone_masks = [self._cell_mask(z.rect) for z in cfg.zones]
+
+    def reconfigure(self, cfg: HeatmapConfig) -> None:
+        if (cfg.grid_w, cfg.grid_h, cfg.frame_w, cfg.frame_h) != (
+            self.cfg.grid_w,
+            self.cfg.grid_h,
+            self.cfg.frame_w,
+            self.cfg.frame_h,
+        ):
+            self._reset(cfg)
+            return
+        self.cfg = cfg
+        self._zone_masks = [self._cell_mask(z.rect) for z in cfg.zones]
+
+    def grid(self, stream_id: str) -> Optional[np.ndarray]:
+        slot = self._slots.get(stream_id)
+        return None if slot is None else self._grids[slot]
+
+    def update(self, batch: PersonBatch, now: float) -> HeatmapFeatures:
+        cfg = self.cfg
+        slots = np.array([self._slot(name) for name in batch.streams], dtype=np.int64)
+
+        if self._last_update is not None:
+            decay = math.exp(-max(0.0, now - self._last_update) / cfg.decay_s)
+            self._grids *= decay
+        else:
+            decay = 0.0
+        self._last_update = now
+
+        if len(batch):
+            self._last_occupied = now
+            # Bilinear splat so a track moving between cells changes the map smoothly.
+            gx = np.clip(batch.x / cfg.frame_w * cfg.grid_w - 0.5, 0.0, cfg.grid_w - 1.0)
+            gy = np.clip(batch.y / cfg.frame_h * cfg.grid_h - 0.5, 0.0, cfg.grid_h - 1.0)
+            x0 = np.floor(gx).astype(np.int64)
+            y0 = np.floor(gy).astype(np.int64)
+            fx = (gx - x0).astype(np.float32)
+            fy = (gy - y0).astype(np.float32)
+            x1 = np.minimum(x0 + 1, cfg.grid_w - 1)
+            y1 = np.minimum(y0 + 1, cfg.grid_h - 1)
+            base = slots[batch.stream] * (cfg.grid_h * cfg.grid_w)
+            idx = np.concatenate(
+                [base + y0 * cfg.grid_w + x0, base + y0 * cfg.grid_w + x1, base + y1 * cfg.grid_w + x0, base + y1 * cfg.grid_w + x1]
+            )
+            weights = np.concatenate([(1 - fx) * (1 - fy), fx * (1 - fy), (1 - fx) * fy, fx * fy])
+            # Scaled by (1 - decay) so a cell's steady-state value is the number of people standing in it.
+            flat = self._grids.reshape(-1)
+            flat += (1.0 - decay) * np.bincount(idx, weights=weights, minlength=flat.size).astype(np.float32)
+
+        presence = 0.0
+        if self._last_occupied is not None:
+            presence = math.exp(-(now - self._last_occupied) / cfg.decay_s)
+        return self._features(presence)
+
+    def _features(self, presence: float) -> HeatmapFeatures:
+        # Grids hold people per cell, so zone occupancy is an absolute head count. Spread and hotspot are
+        # scaled by presence, which decays at the map's rate from the last tick that saw anyone, so they
+        # fade out once the room empties instead of holding their last value.
+        grids = self._grids
+        features = HeatmapFeatures(zone_occupancy={z.name: 0.0 for z in self.cfg.zones})
+        if grids.size == 0:
+            return features
+
+        col = grids.sum(axis=1)  # (cameras, grid_w)
+        row = grids.sum(axis=2)  # (cameras, grid_h)
+        mass = col.sum(axis=1)
+        total = float(mass.sum())
+        if total <= 1e-6:
+            return features
+
+        safe = np.maximum(mass, 1e-6)
+        mx = (col @ self._xs) / safe
+        my = (row @ self._ys) / safe
+        var = (col @ (self._xs ** 2)) / safe - mx ** 2 + (row @ (self._ys ** 2)) / safe - my ** 2
+        # A uniform spread over the frame has variance 1/12 per axis.
+        spread = np.sqrt(np.clip(var, 0.0, None) / (1.0 / 6.0))
+        features.spatial_spread = float(np.clip((mass * spread).sum() / total, 0.0, 1.0)) * presence
+
+        slot = self._hotspot_slot()
+        if slot is not None and mass[slot] > 1e-6:
+            hy, hx = np.unravel_index(int(grids[slot].argmax()), grids[slot].shape)
+            features.hotspot_x = float(self._xs[hx]) * presence
+            features.hotspot_y = float(self._ys[hy]) * presence
+
+        for zone, mask in zip(self.cfg.zones, self._zone_masks):
+            cams = [self._slots[s] for s in zone.streams if s in self._slots]
+            features.zone_occupancy[zone.name] = float(grids[cams][:, mask].sum())
+        return features
+
+    def _hotspot_slot(self) -> Optional[int]:
+        # Coordinates from different cameras' frames are not comparable, so the hotspot comes from one camera.
+        if self.cfg.hotspot_stream is not None:
+            return self._slots.get(self.cfg.hotspot_stream)
+        return 0 if len(self._slots) == 1 else None
+
+    def _slot(self, stream_id: str) -> int:
+        slot = self._slots.get(stream_id)
+        if slot is None:
+            slot = len(self._slots)
+            self._slots[stream_id] = slot
+            grow = np.zeros((1, self.cfg.grid_h, self.cfg.grid_w), dtype=np.float32)
+            self._grids = np.concatenate([self._grids, grow])
+        return slot
+
+    def _cell_mask(self, rect: Tuple[float, float, float, float]) -> np.ndarray:
+        x0, y0, x1, y1 = rect
+        mx = (self._xs >= x0) & (self._xs < x1)
+        my = (self._ys >= y0) & (self._ys < y1)
+        return my[:, None] & mx[None, :]
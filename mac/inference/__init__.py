@@ -0,0 +1,4 @@
+from .client import InferenceClient
+from .server import InferenceServer
+
+__all__ = ["InferenceClient", "InferenceServer"]
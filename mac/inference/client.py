@@ -0,0 +1,127 @@
+import os
+import socket
+import time
+from multiprocessing import shared_memory
+from typing import Optional, Tuple
+
+import numpy as np
+
+from .protocol import (
+    DEFAULT_SOCKET,
+    ERROR_ID,
+    INFER,
+    MSG_ERROR,
+    MSG_HELLO,
+    MSG_INFER,
+    MSG_RESULT,
+    RESULT,
+    recv_message,
+    send_message,
+)
+
+# Matches protocol.BOX so replies decode without a Python loop.
+BOX_DTYPE = np.dtype([("xyxy", "<f4", 4), ("cls", "<u2"), ("conf", "<f4")])
+
+
+class InferenceClient:
+    def __init__(self, config: dict):
+        self.socket_path = config.get("inference_socket", DEFAULT_SOCKET)
+        self.client_name = config.get("inference_client", f"pid{os.getpid()}")
+        self.timeout_s = float(config.get("inference_timeout_s", 5.0))
+        self.reconnect_interval_s = float(config.get("inference_reconnect_s", 2.0))
+
+        self._sock: Optional[socket.socket] = None
+        self._shm: Optional[shared_memory.SharedMemory] = None
+        self._req_id = 0
+        self._next_connect = 0.0
+        self.last_queue_wait_ms = 0.0
+        self.last_batch_size = 0
+
+    def connect(self) -> bool:
+        if self._sock is not None:
+            return True
+        now = time.time()
+        if now < self._next_connect:
+            return False
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout_s)
+        try:
+            sock.connect(self.socket_path)
+        except OSError:
+            sock.close()
+            self._next_connect = now + self.reconnect_interval_s
+            return False
+        self._sock = sock
+        if self._shm is not None:
+            try:
+                self._hello()
+            except OSError:
+                self._drop()
+                return False
+        return True
+
+    def close(self) -> None:
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            finally:
+                self._sock = None
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+    def infer(self, frame: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        # Returns (xyxy, cls, conf); raises RuntimeError if the service is unavailable.
+        if not self.connect():
+            raise RuntimeError(f"inference service not available at {self.socket_path}")
+        frame = np.ascontiguousarray(frame, dtype=np.uint8)
+        self._req_id = (self._req_id + 1) & 0xFFFFFFFF
+        height, width = frame.shape[:2]
+        channels = frame.shape[2] if frame.ndim == 3 else 1
+        try:
+            if self._shm is None or self._shm.size < frame.nbytes:
+                self._allocate(frame.nbytes)
+            np.ndarray(frame.shape, dtype=np.uint8, buffer=self._shm.buf)[...] = frame
+            send_message(self._sock, MSG_INFER, INFER.pack(self._req_id, height, width, channels))
+            reply = recv_message(self._sock)
+        except OSError as exc:
+            self._drop()
+            raise RuntimeError(f"inference service error: {exc}") from exc
+        if reply is None:
+            self._drop()
+            raise RuntimeError("inference service closed the connection")
+
+        msg_type, body = reply
+        if msg_type == MSG_ERROR:
+            raise RuntimeError(f"inference service: {body[ERROR_ID.size:].decode('utf-8', 'replace')}")
+        if msg_type != MSG_RESULT:
+            self._drop()
+            raise RuntimeError(f"unexpected inference reply type {msg_type}")
+
+        _, count, self.last_queue_wait_ms, self.last_batch_size = RESULT.unpack_from(body)
+        boxes = np.frombuffer(
+            body,
+            dtype=BOX_DTYPE,
+            count=count,
+            offset=RESULT.size,
+        )
+        return boxes["xyxy"], boxes["cls"].astype(np.int32), boxes["conf"]
+
+    def _allocate(self, size: int) -> None:
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+        self._shm = shared_memory.SharedMemory(create=True, size=size)
+        self._hello()
+
+    def _hello(self) -> None:
+        body = self._shm.name.encode("utf-8") + b"\0" + self.client_name.encode("utf-8")
+        send_message(self._sock, MSG_HELLO, body)
+
+    def _drop(self) -> None:
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+        self._next_connect = time.time() + self.reconnect_interval_s
+
@@ -0,0 +1,46 @@
+import socket
+import struct
+from typing import Optional, Tuple
+
+# Every message: length of body, message type, body.
+MESSAGE = struct.Struct("<IB")
+
+MSG_HELLO = 1  # body: shm name + "\0" + client name (utf-8)
+MSG_INFER = 2  # body: INFER
+MSG_RESULT = 3  # body: RESULT + count * BOX
+MSG_ERROR = 4  # body: req_id (uint32) + utf-8 message
+
+# req_id, height, width, channels
+INFER = struct.Struct("<IHHB")
+# req_id, count, queue_wait_ms, batch_size
+RESULT = struct.Struct("<IHfH")
+# x1, y1, x2, y2, class, confidence
+BOX = struct.Struct("<ffffHf")
+ERROR_ID = struct.Struct("<I")
+
+DEFAULT_SOCKET = "/tmp/vision-drone-infer.sock"
+
+
+def send_message(sock: socket.socket, msg_type: int, body: bytes) -> None:
+    sock.sendall(MESSAGE.pack(len(body), msg_type) + body)
+
+
+def recv_exact(sock: socket.socket, size: int) -> Optional[bytes]:
+    buf = bytearray()
+    while len(buf) < size:
+        chunk = sock.recv(size - len(buf))
+        if not chunk:
+            return None
+        buf.extend(chunk)
+    return bytes(buf)
+
+
+def recv_message(sock: socket.socket) -> Optional[Tuple[int, bytes]]:
+    header = recv_exact(sock, MESSAGE.size)
+    if header is None:
+        return None
+    size, msg_type = MESSAGE.unpack(header)
+    body = recv_exact(sock, size) if size else b""
+    if body is None:
+        return None
+    return msg_type, body
@@ -0,0 +1,268 @@
+import os
+import queue
+import select
+import socket
+import threading
+import time
+from dataclasses import dataclass, field
+from multiprocessing import resource_tracker, shared_memory
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from workers import WorkerThreads
+
+from .protocol import (
+    BOX,
+    DEFAULT_SOCKET,
+    ERROR_ID,
+    INFER,
+    MSG_ERROR,
+    MSG_HELLO,
+    MSG_INFER,
+    MSG_RESULT,
+    RESULT,
+    recv_message,
+    send_message,
+)
+
+
+@dataclass
+class ClientConn:
+    conn: socket.socket
+    name: str = "?"
+    shm: Optional[shared_memory.SharedMemory] = None
+    frames: int = 0
+    reported_frames: int = 0
+
+
+@dataclass
+class InferRequest:
+    client: ClientConn
+    req_id: int
+    frame: np.ndarray
+    enqueued: float
+
+
+@dataclass
+class ServerStats:
+    batches: int = 0
+    requests: int = 0
+    queue_wait_s: float = 0.0
+    infer_s: float = 0.0
+    clients: Dict[int, ClientConn] = field(default_factory=dict)
+
+
+def attach_shm(name: str) -> shared_memory.SharedMemory:
+    shm = shared_memory.SharedMemory(name=name)
+    # The client owns the segment; stop our resource tracker from unlinking it when we exit.
+    try:
+        resource_tracker.unregister(shm._name, "shared_memory")
+    except Exception:
+        pass
+    return shm
+
+
+def release_shm(client: ClientConn) -> None:
+    if client.shm is None:
+        return
+    try:
+        client.shm.close()
+    except BufferError:
+        # A queued request still holds a view; the mapping goes away with it.
+        pass
+    client.shm = None
+
+
+class InferenceServer:
+    def __init__(self, config: dict):
+        self.socket_path = config.get("inference_socket", DEFAULT_SOCKET)
+        self.model_name = config.get("model", "yolov8n.pt")
+        self.conf = min(float(config.get("conf", 0.4)), float(config.get("phone_conf", 0.25)))
+        self.iou = float(config.get("iou", 0.5))
+        self.classes = [int(config.get("person_class", 0)), int(config.get("phone_class", 67))]
+        self.batch_size = int(config.get("inference_batch_size", 8))
+        self.batch_window_s = float(config.get("inference_batch_window_ms", 5.0)) / 1000.0
+        self.report_interval_s = float(config.get("inference_report_s", 5.0))
+
+        self._model = None
+        self._queue: "queue.Queue[InferRequest]" = queue.Queue()
+        self._stop_event = threading.Event()
+        self._workers = WorkerThreads()
+        self._sock: Optional[socket.socket] = None
+        self._stats_lock = threading.Lock()
+        self._stats = ServerStats()
+
+    def start(self) -> None:
+        from ultralytics import YOLO
+
+        self._model = YOLO(self.model_name)
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.bind(self.socket_path)
+        sock.listen()
+        sock.settimeout(0.5)
+        self._sock = sock
+        self._stop_event.clear()
+        self._workers.spawn(self._run_accept, "InferenceServer-accept")
+        self._workers.spawn(self._run_batcher, "InferenceServer-batcher")
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self._workers.join(timeout=2.0)
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+    def report(self, elapsed: float) -> str:
+        with self._stats_lock:
+            stats = self._stats
+            mean_batch = stats.requests / stats.batches if stats.batches else 0.0
+            wait_ms = 1000.0 * stats.queue_wait_s / stats.requests if stats.requests else 0.0
+            infer_ms = 1000.0 * stats.infer_s / stats.batches if stats.batches else 0.0
+            per_client = []
+            for client in stats.clients.values():
+                fps = (client.frames - client.reported_frames) / max(1e-3, elapsed)
+                client.reported_frames = client.frames
+                per_client.append(f"{client.name}={fps:.1f}fps")
+            self._stats = ServerStats(clients=stats.clients)
+        return (
+            "inference: "
+            f"clients={len(per_client)} "
+            f"batch={mean_batch:.2f} "
+            f"wait={wait_ms:.1f}ms "
+            f"infer={infer_ms:.1f}ms "
+            + " ".join(per_client)
+        )
+
+    def serve_forever(self) -> None:
+        self.start()
+        print(f"inference: serving {self.model_name} on {self.socket_path}")
+        last_report = time.time()
+        try:
+            while True:
+                time.sleep(self.report_interval_s)
+                now = time.time()
+                print(self.report(now - last_report))
+                last_report = now
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def _run_accept(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                conn, _ = self._sock.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            client = ClientConn(conn=conn)
+            with self._stats_lock:
+                self._stats.clients[id(client)] = client
+            self._workers.spawn(self._run_client, f"InferenceServer-client-{conn.fileno()}", client)
+
+    def _run_client(self, client: ClientConn) -> None:
+        client.conn.settimeout(None)
+        try:
+            while not self._stop_event.is_set():
+                # Wait with a timeout, then read a whole message so a timeout never splits one.
+                try:
+                    ready, _, _ = select.select([client.conn], [], [], 0.5)
+                    if not ready:
+                        continue
+                    message = recv_message(client.conn)
+                except OSError:
+                    break
+                if message is None:
+                    break
+                msg_type, body = message
+                if msg_type == MSG_HELLO:
+                    shm_name, _, name = body.partition(b"\0")
+                    release_shm(client)
+                    client.shm = attach_shm(shm_name.decode("utf-8"))
+                    client.name = name.decode("utf-8") or client.name
+                elif msg_type == MSG_INFER:
+                    req_id, height, width, channels = INFER.unpack(body)
+                    if client.shm is None or client.shm.size < height * width * channels:
+                        send_message(client.conn, MSG_ERROR, ERROR_ID.pack(req_id) + b"frame does not fit shared memory")
+                        continue
+                    shape = (height, width, channels) if channels > 1 else (height, width)
+                    frame = np.ndarray(shape, dtype=np.uint8, buffer=client.shm.buf)
+                    self._queue.put(InferRequest(client=client, req_id=req_id, frame=frame, enqueued=time.time()))
+        finally:
+            with self._stats_lock:
+                self._stats.clients.pop(id(client), None)
+            client.conn.close()
+            release_shm(client)
+
+    def _collect_batch(self) -> List[InferRequest]:
+        try:
+            first = self._queue.get(timeout=0.5)
+        except queue.Empty:
+            return []
+        batch = [first]
+        deadline = time.time() + self.batch_window_s
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run_batcher(self) -> None:
+        while not self._stop_event.is_set():
+            batch = self._collect_batch()
+            if not batch:
+                continue
+            started = time.time()
+            try:
+                results = self._model(
+                    [req.frame for req in batch],
+                    conf=self.conf,
+                    iou=self.iou,
+                    classes=self.classes,
+                    verbose=False,
+                )
+            except Exception as exc:
+                for req in batch:
+                    self._reply_error(req, str(exc))
+                continue
+            finished = time.time()
+
+            for req, res in zip(batch, results):
+                wait_ms = 1000.0 * (started - req.enqueued)
+                self._reply(req, res, wait_ms, len(batch))
+
+            with self._stats_lock:
+                self._stats.batches += 1
+                self._stats.requests += len(batch)
+                self._stats.queue_wait_s += sum(started - req.enqueued for req in batch)
+                self._stats.infer_s += finished - started
+                for req in batch:
+                    req.client.frames += 1
+
+    def _reply(self, req: InferRequest, res, wait_ms: float, batch_size: int) -> None:
+        xyxy = res.boxes.xyxy.cpu().numpy()
+        cls = res.boxes.cls.cpu().numpy().astype(np.int32)
+        conf = res.boxes.conf.cpu().numpy()
+        parts = [RESULT.pack(req.req_id, len(xyxy), wait_ms, batch_size)]
+        for (x1, y1, x2, y2), c, p in zip(xyxy.tolist(), cls.tolist(), conf.tolist()):
+            parts.append(BOX.pack(x1, y1, x2, y2, c, p))
+        try:
+            send_message(req.client.conn, MSG_RESULT, b"".join(parts))
+        except OSError:
+            pass
+
+    def _reply_error(self, req: InferRequest, message: str) -> None:
+        try:
+            send_message(req.client.conn, MSG_ERROR, ERROR_ID.pack(req.req_id) + message.encode("utf-8"))
+        except OSError:
+            pass
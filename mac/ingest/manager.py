@@ -1,31 +1,71 @@
-from typing import Dict, Iterable, List, Optional
+from typing import Dict, Iterable, List, Optional, Tuple
 
 from .camera_stream import CameraStream
 
 
+def build_stream(cfg: dict) -> CameraStream:
+    return CameraStream(
+        stream_id=cfg["id"],
+        rtsp_url=cfg.get("rtsp_url"),
+        latency_ms=cfg.get("latency_ms", 200),
+        protocol=cfg.get("protocol", "udp"),
+        udp_port=cfg.get("udp_port"),
+        reconnect_interval_s=cfg.get("reconnect_interval_s", 2.0),
+        use_pyav=cfg.get("use_pyav", True),
+    )
+
+
 class CameraManager:
     def __init__(self, camera_configs: Iterable[dict]):
         self._streams: Dict[str, CameraStream] = {}
+        self._configs: Dict[str, dict] = self.parse_config(camera_configs)
+        self._started = False
+        for stream_id, cfg in self._configs.items():
+            self._streams[stream_id] = build_stream(cfg)
+
+    @staticmethod
+    def parse_config(camera_configs: Iterable[dict]) -> Dict[str, dict]:
+        configs: Dict[str, dict] = {}
         for cfg in camera_configs:
-            stream = CameraStream(
-                stream_id=cfg["id"],
-                rtsp_url=cfg.get("rtsp_url"),
-                latency_ms=cfg.get("latency_ms", 200),
-                protocol=cfg.get("protocol", "udp"),
-                udp_port=cfg.get("udp_port"),
-                reconnect_interval_s=cfg.get("reconnect_interval_s", 2.0),
-                use_pyav=cfg.get("use_pyav", True),
-            )
-            self._streams[stream.stream_id] = stream
+            if "id" not in cfg:
+                raise ValueError("camera config is missing 'id'")
+            if cfg["id"] in configs:
+                raise ValueError(f"duplicate camera id: {cfg['id']}")
+            protocol = cfg.get("protocol", "udp").lower()
+            if protocol == "udp" and cfg.get("udp_port") is None:
+                raise ValueError(f"camera {cfg['id']}: udp_port is required when protocol=udp")
+            if protocol != "udp" and not cfg.get("rtsp_url"):
+                raise ValueError(f"camera {cfg['id']}: rtsp_url is required when protocol={protocol}")
+            configs[cfg["id"]] = dict(cfg)
+        return configs
 
     def start(self) -> None:
+        self._started = True
         for stream in self._streams.values():
             stream.start()
 
     def stop(self) -> None:
+        self._started = False
         for stream in self._streams.values():
             stream.stop()
 
+    def reconfigure(self, camera_configs: Iterable[dict]) -> Tuple[List[str], List[str], List[str]]:
+        # Only cameras whose config changed are touched; returns (added, removed, restarted) ids.
+        configs = self.parse_config(camera_configs)
+        added = [sid for sid in configs if sid not in self._configs]
+        removed = [sid for sid in self._configs if sid not in configs]
+        restarted = [sid for sid in configs if sid in self._configs and configs[sid] != self._configs[sid]]
+
+        for stream_id in removed + restarted:
+            self._streams.pop(stream_id).stop()
+        for stream_id in added + restarted:
+            stream = build_stream(configs[stream_id])
+            self._streams[stream_id] = stream
+            if self._started:
+                stream.start()
+        self._configs = configs
+        return added, removed, restarted
+
     def get_latest_frames(self) -> Dict[str, dict]:
         frames: Dict[str, dict] = {}
         for stream_id, stream in self._streams.items():
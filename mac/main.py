@@ -1,8 +1,9 @@
 import argparse
+import os
 import random
 import time
 from dataclasses import dataclass
-from typing import List
+from typing import Callable, List, Optional, Tuple
 
 import cv2
 
@@ -11,7 +12,9 @@ from fusion import FeatureFusion
 from music import MusicEngine
 from music.events import MidiEvent
 from midi.output import MidiOutput
-from vision import VisionEngine
+from remote import VisionReceiver, VisionSender
+from telemetry import TelemetryWriter
+from vision import PersonBatch, VisionEngine
 
 
 @dataclass
@@ -22,6 +25,9 @@ class IngestConfig:
     midi: dict = None
     vision: dict = None
     fusion: dict = None
+    remote: dict = None
+    telemetry: dict = None
+    watch_interval_s: float = 1.0
 
 
 def load_config(path: str) -> IngestConfig:
@@ -40,9 +46,103 @@ def load_config(path: str) -> IngestConfig:
         midi=raw.get("midi", {}),
         vision=raw.get("vision", {}),
         fusion=raw.get("fusion", {}),
+        remote=raw.get("remote", {}),
+        telemetry=raw.get("telemetry", {}),
+        watch_interval_s=float(raw.get("watch_interval_s", 1.0)),
     )
 
 
+def validate_config(config: IngestConfig) -> None:
+    if config.tick_interval <= 0:
+        raise ValueError("tick_interval must be positive")
+    CameraManager.parse_config(config.cameras)
+    VisionEngine.parse_config(config.vision or {})
+    FeatureFusion.parse_config(config.fusion or {})
+    MusicEngine.parse_config(config.music or {})
+
+
+class ConfigWatcher:
+    def __init__(self, path: str, interval_s: float = 1.0):
+        self.path = path
+        self.interval_s = interval_s
+        self._signature = self._stat()
+        self._next_check = 0.0
+
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def poll(self, now: Optional[float] = None) -> Optional[IngestConfig]:
+        # Returns a validated config when the file changed, otherwise None.
+        now = now or time.time()
+        if self.interval_s <= 0 or now < self._next_check:
+            return None
+        self._next_check = now + self.interval_s
+        signature = self._stat()
+        if signature is None or signature == self._signature:
+            return None
+        self._signature = signature
+        try:
+            config = load_config(self.path)
+            validate_config(config)
+        except Exception as exc:
+            print(f"config: ignoring invalid {self.path} ({exc})")
+            return None
+        return config
+
+
+def apply_config(
+    current: IngestConfig,
+    new: IngestConfig,
+    camera_manager: Optional[CameraManager] = None,
+    vision_engine: Optional[VisionEngine] = None,
+    fusion_engine: Optional[FeatureFusion] = None,
+    music_engine: Optional[MusicEngine] = None,
+    midi_out: Optional[MidiOutput] = None,
+    sender: Optional[VisionSender] = None,
+) -> IngestConfig:
+    def apply_cameras(cfg: IngestConfig) -> None:
+        added, removed, restarted = camera_manager.reconfigure(cfg.cameras)
+        for stream_id in removed:
+            if vision_engine:
+                vision_engine.drop_stream(stream_id)
+        if added or removed or restarted:
+            print(f"config: cameras added={added} removed={removed} restarted={restarted}")
+
+    steps: List[Callable[[IngestConfig], None]] = []
+    if sender:
+        steps.append(lambda cfg: sender.check_streams(cam["id"] for cam in cfg.cameras))
+    if fusion_engine:
+        steps.append(lambda cfg: fusion_engine.reconfigure(cfg.fusion or {}))
+    if music_engine:
+        steps.append(lambda cfg: music_engine.reconfigure(cfg.music or {}))
+    if midi_out:
+        steps.append(lambda cfg: midi_out.reconfigure(cfg.midi or {}))
+    if vision_engine:
+        steps.append(lambda cfg: vision_engine.reconfigure(cfg.vision or {}))
+    if camera_manager:
+        steps.append(apply_cameras)
+
+    applied: List[Callable[[IngestConfig], None]] = []
+    try:
+        for step in steps:
+            applied.append(step)
+            step(new)
+    except Exception as exc:
+        print(f"config: failed to apply ({exc}); rolling back")
+        for step in reversed(applied):
+            try:
+                step(current)
+            except Exception as rollback_exc:
+                print(f"config: rollback step failed ({rollback_exc})")
+        return current
+    print("config: reloaded")
+    return new
+
+
 def run_ingest_only(config: IngestConfig) -> None:
     camera_manager = CameraManager(config.cameras)
     camera_manager.start()
@@ -64,24 +164,46 @@ def run_ingest_only(config: IngestConfig) -> None:
         camera_manager.stop()
 
 
-def run_pipeline(config: IngestConfig) -> None:
+def run_pipeline(
+    config: IngestConfig,
+    receiver: Optional[VisionReceiver] = None,
+    watcher: Optional[ConfigWatcher] = None,
+) -> None:
     camera_manager = CameraManager(config.cameras)
     vision_engine = VisionEngine(config.vision or {})
     fusion_engine = FeatureFusion(config.fusion or {})
     music_engine = MusicEngine(config.music or {})
     midi_out = MidiOutput(config.midi or {})
+    telemetry = TelemetryWriter(config.telemetry or {})
 
     camera_manager.start()
+    if receiver:
+        receiver.start()
+    telemetry.start()
     midi_out.open()
     last_print = 0.0
     try:
         while True:
+            new_config = watcher.poll() if watcher else None
+            if new_config:
+                before = set(camera_manager.list_stream_ids())
+                config = apply_config(
+                    config, new_config, camera_manager, vision_engine, fusion_engine, music_engine, midi_out
+                )
+                for stream_id in before - set(camera_manager.list_stream_ids()):
+                    try:
+                        cv2.destroyWindow(f"pipeline-{stream_id}")
+                    except cv2.error:
+                        pass
             frames = camera_manager.get_latest_frames()
             vision_results = vision_engine.process(frames)
+            if receiver:
+                vision_results = PersonBatch.concat([vision_results, receiver.get_results()])
             features = fusion_engine.update(vision_results)
             events = music_engine.generate(features)
             midi_out.send(events)
             now = time.time()
+            telemetry.log(now, vision_results, features)
             if now - last_print >= 1.0:
                 print(
                     "pipeline: "
@@ -89,6 +211,8 @@ def run_pipeline(config: IngestConfig) -> None:
                     f"energy={features.movement_energy:.2f} "
                     f"stationary={features.stationary_ratio:.2f} "
                     f"phone={features.phone_ratio:.2f}"
+                    + (f" merged={fusion_engine.merged_count}" if fusion_engine.merged_count else "")
+                    + (f" nodes={len(receiver.list_nodes())}" if receiver else "")
                 )
                 last_print = now
             for stream_id, payload in frames.items():
@@ -98,10 +222,13 @@ def run_pipeline(config: IngestConfig) -> None:
                 boxes = vision_engine.get_last_boxes(stream_id)
                 for (x, y, w, h) in boxes:
                     cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
+                for (x, y, w, h) in vision_engine.get_last_phone_boxes(stream_id):
+                    cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 165, 255), 2)
                 overlay = (
                     f"p={features.total_people} "
                     f"e={features.movement_energy:.2f} "
-                    f"s={features.stationary_ratio:.2f}"
+                    f"s={features.stationary_ratio:.2f} "
+                    f"ph={features.phone_ratio:.2f}"
                 )
                 cv2.putText(frame, overlay, (10, 24), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
                 cv2.imshow(f"pipeline-{stream_id}", frame)
@@ -112,10 +239,42 @@ def run_pipeline(config: IngestConfig) -> None:
         pass
     finally:
         camera_manager.stop()
+        if receiver:
+            receiver.stop()
+        telemetry.stop()
         midi_out.close()
         cv2.destroyAllWindows()
 
 
+def run_vision_node(config: IngestConfig, watcher: Optional[ConfigWatcher] = None) -> None:
+    camera_manager = CameraManager(config.cameras)
+    vision_engine = VisionEngine(config.vision or {})
+    sender = VisionSender(config.remote or {})
+    sender.check_streams(cam["id"] for cam in config.cameras)
+
+    camera_manager.start()
+    last_print = 0.0
+    try:
+        while True:
+            new_config = watcher.poll() if watcher else None
+            if new_config:
+                config = apply_config(config, new_config, camera_manager, vision_engine, sender=sender)
+            frames = camera_manager.get_latest_frames()
+            results = vision_engine.process(frames)
+            sender.send(results)
+            now = time.time()
+            if now - last_print >= 1.0:
+                counts = results.stream_counts()
+                print(f"vision-node: {sender.node_id} -> {sender.host}:{sender.port} {counts} errors={sender.errors}")
+                last_print = now
+            time.sleep(config.tick_interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        camera_manager.stop()
+        sender.close()
+
+
 def run_midi_test(config: IngestConfig) -> None:
     music_engine = MusicEngine(config.music or {})
     midi_out = MidiOutput(config.midi or {})
@@ -155,8 +314,12 @@ def run_vision_test(config: IngestConfig) -> None:
             results = vision_engine.process(frames)
             now = time.time()
             if now - last_print >= 1.0:
-                counts = {sid: len(people) for sid, people in results.items()}
-                print(f"vision: {counts}")
+                energy = ""
+                if vision_engine.detector == "motion":
+                    energy = " motion=" + " ".join(
+                        f"{sid}:{vision_engine.get_motion_energy(sid):.3f}" for sid in frames
+                    )
+                print(f"vision: {results.stream_counts()}{energy}")
                 last_print = now
             for stream_id, payload in frames.items():
                 frame = payload.get("frame")
@@ -202,7 +365,7 @@ def run_vision_file_test(config: IngestConfig, path: str, with_midi: bool = Fals
                 midi_out.send(events)
             now = time.time()
             if now - last_print >= 1.0:
-                count = len(results.get("file", []))
+                count = results.stream_counts().get("file", 0)
                 print(f"vision-file: {count} midi={'on' if midi_out else 'off'}")
                 last_print = now
             boxes = vision_engine.get_last_boxes("file")
@@ -221,6 +384,33 @@ def run_vision_file_test(config: IngestConfig, path: str, with_midi: bool = Fals
         cv2.destroyAllWindows()
 
 
+def grab_frame(config: IngestConfig, source: str, timeout_s: float = 10.0):
+    if os.path.isfile(source):
+        return cv2.imread(source)
+    cameras = [cam for cam in config.cameras if cam.get("id") == source]
+    if not cameras:
+        raise RuntimeError(f"{source} is neither an image file nor a configured camera id")
+    camera_manager = CameraManager(cameras)
+    camera_manager.start()
+    try:
+        deadline = time.time() + timeout_s
+        while time.time() < deadline:
+            frame = camera_manager.get_latest_frames()[source]["frame"]
+            if frame is not None:
+                return frame.copy()
+            time.sleep(0.1)
+    finally:
+        camera_manager.stop()
+    raise RuntimeError(f"No frame from {source} within {timeout_s:.0f}s")
+
+
+def run_floor_calibration(config: IngestConfig, source: str) -> None:
+    from fusion.calibrate import calibrate_floor
+
+    frame = grab_frame(config, source)
+    calibrate_floor(frame, source if not os.path.isfile(source) else "<camera id>")
+
+
 def main() -> None:
     parser = argparse.ArgumentParser()
     parser.add_argument("--config", default="config/ingest.yaml", help="Path to ingest config")
@@ -230,9 +420,16 @@ def main() -> None:
     parser.add_argument("--vision-file", default="", help="Run vision test on a local video file")
     parser.add_argument("--vision-test-file", action="store_true", help="Run vision test on mac/test.mp4")
     parser.add_argument("--vision-test-file-midi", action="store_true", help="Run vision test on mac/test.mp4 with MIDI")
+    parser.add_argument("--vision-node", action="store_true", help="Run cameras + vision and send people to a fusion host")
+    parser.add_argument("--fusion-host", action="store_true", help="Run the pipeline and merge people from vision nodes")
+    parser.add_argument("--dedup-test", type=int, nargs="?", const=12, default=0, metavar="PEOPLE", help="Run synthetic cross-camera duplicate test")
+    parser.add_argument("--calibrate-floor", default="", metavar="CAMERA_OR_IMAGE", help="Compute a floor homography by clicking floor marks")
+    parser.add_argument("--motion-bench", nargs="?", const="mac/test.mp4", default="", metavar="VIDEO", help="Time the motion detector paths on a video file")
+    parser.add_argument("--inference-server", action="store_true", help="Serve YOLO to local pipelines (vision.detector: yolo_service)")
     args = parser.parse_args()
 
     config = load_config(args.config)
+    watcher = ConfigWatcher(args.config, config.watch_interval_s)
     if args.ingest_only:
         run_ingest_only(config)
         return
@@ -251,8 +448,32 @@ def main() -> None:
     if args.vision_test_file_midi:
         run_vision_file_test(config, "mac/test.mp4", with_midi=True)
         return
+    if args.motion_bench:
+        from sim.motion_bench import run_motion_benchmark
+
+        run_motion_benchmark(config.vision or {}, args.motion_bench)
+        return
+    if args.dedup_test:
+        from sim.dedup import run_dedup_test
+
+        run_dedup_test(config.fusion or {}, args.dedup_test)
+        return
+    if args.calibrate_floor:
+        run_floor_calibration(config, args.calibrate_floor)
+        return
+    if args.vision_node:
+        run_vision_node(config, watcher=watcher)
+        return
+    if args.inference_server:
+        from inference import InferenceServer
+
+        InferenceServer(config.vision or {}).serve_forever()
+        return
+    if args.fusion_host:
+        run_pipeline(config, receiver=VisionReceiver(config.remote or {}), watcher=watcher)
+        return
 
-    run_pipeline(config)
+    run_pipeline(config, watcher=watcher)
 
 
 if __name__ == "__main__":
@@ -12,6 +12,16 @@ class MidiOutput:
         self.port_name = config.get("port_name", "IAC Driver Bus 1")
         self._port: Optional[mido.ports.BaseOutput] = None
 
+    def reconfigure(self, config: dict) -> None:
+        port_name = config.get("port_name", "IAC Driver Bus 1")
+        if port_name == self.port_name:
+            return
+        was_open = self._port is not None
+        self.close()
+        self.port_name = port_name
+        if was_open:
+            self.open()
+
     def open(self) -> None:
         if self._port is None:
             self._port = mido.open_output(self.port_name)
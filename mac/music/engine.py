@@ -1,7 +1,7 @@
 import math
 import time
 from dataclasses import dataclass
-from typing import List
+from typing import List, Optional
 
 from fusion.features import GlobalFeatures
 from music.events import MidiEvent
@@ -19,6 +19,10 @@ def scale_to_midi(value: float, in_min: float, in_max: float, out_min: int, out_
     return int(round(out_min + t * (out_max - out_min)))
 
 
+def optional_int(value) -> Optional[int]:
+    return None if value is None else int(value)
+
+
 @dataclass
 class Voice:
     voice_id: int
@@ -29,23 +33,60 @@ class Voice:
 
 class MusicEngine:
     def __init__(self, config: dict):
-        self.scale_notes = config.get("scale_notes", [62, 64, 65, 67, 69, 71, 72, 74])
-        self.voice_count = int(config.get("voice_count", 8))
-        self.min_interval_s = float(config.get("min_interval_s", 1.5))
-        self.velocity_min = int(config.get("velocity_min", 20))
-        self.velocity_max = int(config.get("velocity_max", 90))
-        self.cc_movement = int(config.get("cc_movement", 1))
-        self.cc_density = int(config.get("cc_density", 11))
-        self.cc_phone = int(config.get("cc_phone", 74))
-
         self._voices: List[Voice] = []
+        self._pending: List[MidiEvent] = []
+        self.reconfigure(config)
+
+    @staticmethod
+    def parse_config(config: dict) -> dict:
+        scale_notes = [int(n) for n in config.get("scale_notes", [62, 64, 65, 67, 69, 71, 72, 74])]
+        if not scale_notes:
+            raise ValueError("music.scale_notes must not be empty")
+        if float(config.get("zone_max_people", 4.0)) <= 0:
+            raise ValueError("music.zone_max_people must be positive")
+        return {
+            "scale_notes": scale_notes,
+            "voice_count": int(config.get("voice_count", 8)),
+            "min_interval_s": float(config.get("min_interval_s", 1.5)),
+            "velocity_min": int(config.get("velocity_min", 20)),
+            "velocity_max": int(config.get("velocity_max", 90)),
+            "cc_movement": int(config.get("cc_movement", 1)),
+            "cc_density": int(config.get("cc_density", 11)),
+            "cc_phone": int(config.get("cc_phone", 74)),
+            # Spatial CCs are opt-in so existing patches do not receive new controllers.
+            "cc_spread": optional_int(config.get("cc_spread")),
+            "cc_hotspot_x": optional_int(config.get("cc_hotspot_x")),
+            "cc_hotspot_y": optional_int(config.get("cc_hotspot_y")),
+            "cc_zones": {str(name): int(cc) for name, cc in (config.get("cc_zones") or {}).items()},
+            # Zone occupancy is a head count; this many people in a zone sends 127.
+            "zone_max_people": float(config.get("zone_max_people", 4.0)),
+        }
+
+    def reconfigure(self, config: dict) -> None:
+        settings = self.parse_config(config)
+        for name, value in settings.items():
+            setattr(self, name, value)
+
+        # Keep sounding voices whose note is unchanged; release the rest on the next generate().
+        voices: List[Voice] = []
         for i in range(self.voice_count):
             note = self.scale_notes[i % len(self.scale_notes)]
-            self._voices.append(Voice(voice_id=i, midi_note=note))
+            old = self._voices[i] if i < len(self._voices) else None
+            if old is not None and old.midi_note == note:
+                voices.append(old)
+                continue
+            if old is not None and old.active:
+                self._pending.append(MidiEvent(type="note_off", note=old.midi_note, velocity=0))
+            voices.append(Voice(voice_id=i, midi_note=note))
+        for old in self._voices[self.voice_count:]:
+            if old.active:
+                self._pending.append(MidiEvent(type="note_off", note=old.midi_note, velocity=0))
+        self._voices = voices
 
     def generate(self, features: GlobalFeatures, now: float | None = None) -> List[MidiEvent]:
         now = now or time.time()
-        events: List[MidiEvent] = []
+        events: List[MidiEvent] = self._pending
+        self._pending = []
 
         target_active = clamp(features.total_people, 0, self.voice_count)
         target_active = int(target_active)
@@ -71,5 +112,14 @@ class MusicEngine:
         events.append(MidiEvent(type="cc", cc=self.cc_movement, value=scale_to_midi(features.movement_energy, 0, 10, 0, 127)))
         events.append(MidiEvent(type="cc", cc=self.cc_density, value=scale_to_midi(target_active, 0, self.voice_count, 0, 127)))
         events.append(MidiEvent(type="cc", cc=self.cc_phone, value=scale_to_midi(features.phone_ratio, 0, 1, 0, 127)))
+        if self.cc_spread is not None:
+            events.append(MidiEvent(type="cc", cc=self.cc_spread, value=scale_to_midi(features.spatial_spread, 0, 1, 0, 127)))
+        if self.cc_hotspot_x is not None:
+            events.append(MidiEvent(type="cc", cc=self.cc_hotspot_x, value=scale_to_midi(features.hotspot_x, 0, 1, 0, 127)))
+        if self.cc_hotspot_y is not None:
+            events.append(MidiEvent(type="cc", cc=self.cc_hotspot_y, value=scale_to_midi(features.hotspot_y, 0, 1, 0, 127)))
+        for zone, cc in self.cc_zones.items():
+            occupancy = features.zone_occupancy.get(zone, 0.0)
+            events.append(MidiEvent(type="cc", cc=cc, value=scale_to_midi(occupancy, 0, self.zone_max_people, 0, 127)))
 
         return events
@@ -0,0 +1,5 @@
+from .protocol import RemoteBatch, decode_batch, encode_batch
+from .receiver import VisionReceiver
+from .sender import VisionSender
+
+__all__ = ["RemoteBatch", "VisionReceiver", "VisionSender", "decode_batch", "encode_batch"]
@@ -0,0 +1,96 @@
+import struct
+from dataclasses import dataclass
+
+import numpy as np
+
+from vision.types import PersonBatch
+
+
+MAGIC = b"VDPB"
+VERSION = 2
+ID_BYTES = 16
+
+# magic, version, node_id, stream_id, seq, sent_ts, count
+HEADER = struct.Struct("<4sB16s16sIdH")
+# Packed little-endian record, 29 bytes: track_id, x, y, foot_y, velocity, flags, last_seen
+RECORD = np.dtype(
+    [
+        ("track_id", "<u4"),
+        ("x", "<f4"),
+        ("y", "<f4"),
+        ("foot_y", "<f4"),
+        ("velocity", "<f4"),
+        ("flags", "u1"),
+        ("last_seen", "<f8"),
+    ]
+)
+# TCP frames are length-prefixed; UDP sends one batch per datagram.
+FRAME_LEN = struct.Struct("<I")
+
+MAX_UDP_PAYLOAD = 65507
+MAX_RECORDS = (MAX_UDP_PAYLOAD - HEADER.size) // RECORD.itemsize
+
+
+@dataclass
+class RemoteBatch:
+    node_id: str
+    stream_id: str
+    seq: int
+    sent_ts: float
+    people: PersonBatch
+
+
+def encode_id(value: str) -> bytes:
+    raw = value.encode("utf-8")
+    if len(raw) > ID_BYTES:
+        raise ValueError(f"id '{value}' is longer than {ID_BYTES} bytes")
+    return raw
+
+
+def encode_batch(node_id: str, stream_id: str, seq: int, sent_ts: float, people: PersonBatch) -> bytes:
+    # `people` should hold a single stream; see PersonBatch.select.
+    n = min(len(people), MAX_RECORDS)
+    records = np.empty(n, dtype=RECORD)
+    records["track_id"] = people.track_id[:n]
+    records["x"] = people.x[:n]
+    records["y"] = people.y[:n]
+    records["foot_y"] = people.foot_y[:n]
+    records["velocity"] = people.velocity[:n]
+    records["flags"] = people.flags()[:n]
+    records["last_seen"] = people.last_seen[:n]
+    header = HEADER.pack(MAGIC, VERSION, encode_id(node_id), encode_id(stream_id), seq & 0xFFFFFFFF, sent_ts, n)
+    return header + records.tobytes()
+
+
+def decode_batch(data: bytes) -> RemoteBatch:
+    if len(data) < HEADER.size:
+        raise ValueError("batch shorter than header")
+    magic, version, node_id, stream_id, seq, sent_ts, count = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("bad magic")
+    if version != VERSION:
+        raise ValueError(f"unsupported batch version {version}")
+    if len(data) < HEADER.size + count * RECORD.itemsize:
+        raise ValueError("truncated batch")
+
+    records = np.frombuffer(data, dtype=RECORD, count=count, offset=HEADER.size)
+    stream_name = stream_id.rstrip(b"\0").decode("utf-8")
+    people = PersonBatch(
+        streams=[stream_name],
+        track_id=records["track_id"].astype(np.int64),
+        x=records["x"].astype(np.float32),
+        y=records["y"].astype(np.float32),
+        foot_y=records["foot_y"].astype(np.float32),
+        velocity=records["velocity"].astype(np.float32),
+        stationary=(records["flags"] & PersonBatch.FLAG_STATIONARY) != 0,
+        has_phone=(records["flags"] & PersonBatch.FLAG_PHONE) != 0,
+        last_seen=records["last_seen"].astype(np.float64),
+        stream=np.zeros(count, dtype=np.int32),
+    )
+    return RemoteBatch(
+        node_id=node_id.rstrip(b"\0").decode("utf-8"),
+        stream_id=stream_name,
+        seq=seq,
+        sent_ts=sent_ts,
+        people=people,
+    )
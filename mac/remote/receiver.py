@@ -0,0 +1,179 @@
+import socket
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional, Tuple
+
+from vision.types import PersonBatch
+from workers import WorkerThreads
+
+from .protocol import FRAME_LEN, MAX_UDP_PAYLOAD, RemoteBatch, decode_batch
+
+
+@dataclass
+class NodeClock:
+    # Offset from the node's clock to ours: min(recv - sent) over a window of batches.
+    samples: Deque[float] = field(default_factory=lambda: deque(maxlen=100))
+    offset: float = 0.0
+
+    def observe(self, sent_ts: float, recv_ts: float) -> float:
+        self.samples.append(recv_ts - sent_ts)
+        self.offset = min(self.samples)
+        return self.offset
+
+
+@dataclass
+class StreamSlot:
+    batch: RemoteBatch
+    received: float
+
+
+class VisionReceiver:
+    def __init__(self, config: dict):
+        self.bind = config.get("bind", "0.0.0.0")
+        self.port = int(config.get("port", 6000))
+        self.transport = config.get("transport", "udp").lower()
+        self.stale_s = float(config.get("stale_s", 1.0))
+        self.max_person_age_s = float(config.get("max_person_age_s", 2.0))
+        if self.transport not in ("udp", "tcp"):
+            raise ValueError(f"unsupported remote transport: {self.transport}")
+
+        self._clocks: Dict[str, NodeClock] = {}
+        self._slots: Dict[Tuple[str, str], StreamSlot] = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._workers = WorkerThreads()
+        self._sock: Optional[socket.socket] = None
+        self.received = 0
+        self.rejected = 0
+
+    def start(self) -> None:
+        if self._sock is not None:
+            return
+        self._stop_event.clear()
+        if self.transport == "udp":
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            sock.bind((self.bind, self.port))
+            target = self._run_udp
+        else:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            sock.bind((self.bind, self.port))
+            sock.listen()
+            target = self._run_tcp_accept
+        sock.settimeout(0.5)
+        self._sock = sock
+        self._workers.spawn(target, f"VisionReceiver-{self.transport}")
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self._workers.join(timeout=2.0)
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+    def get_results(self, now: Optional[float] = None) -> PersonBatch:
+        now = now or time.time()
+        batches: List[PersonBatch] = []
+        with self._lock:
+            for (node_id, stream_id), slot in list(self._slots.items()):
+                if (now - slot.received) > self.stale_s:
+                    self._slots.pop((node_id, stream_id), None)
+                    continue
+                people = slot.batch.people
+                last_seen = people.last_seen + self._clocks[node_id].offset
+                fresh = (now - last_seen) <= self.max_person_age_s
+                people = PersonBatch(
+                    streams=[f"{node_id}/{stream_id}"],
+                    track_id=people.track_id[fresh],
+                    x=people.x[fresh],
+                    y=people.y[fresh],
+                    foot_y=people.foot_y[fresh],
+                    velocity=people.velocity[fresh],
+                    stationary=people.stationary[fresh],
+                    has_phone=people.has_phone[fresh],
+                    last_seen=last_seen[fresh],
+                    stream=people.stream[fresh],
+                )
+                batches.append(people)
+        return PersonBatch.concat(batches)
+
+    def list_nodes(self) -> List[str]:
+        with self._lock:
+            return sorted({node_id for node_id, _ in self._slots})
+
+    def _accept(self, data: bytes) -> None:
+        recv_ts = time.time()
+        try:
+            batch = decode_batch(data)
+        except ValueError:
+            with self._lock:
+                self.rejected += 1
+            return
+
+        key = (batch.node_id, batch.stream_id)
+        with self._lock:
+            slot = self._slots.get(key)
+            if slot is not None and batch.seq <= slot.batch.seq:
+                # Reordered datagrams were sent earlier; a lower seq sent later means the node restarted
+                # (or seq wrapped), so start the slot and the node's clock estimate over.
+                if batch.sent_ts <= slot.batch.sent_ts:
+                    self.rejected += 1
+                    return
+                self._clocks.pop(batch.node_id, None)
+            self._clocks.setdefault(batch.node_id, NodeClock()).observe(batch.sent_ts, recv_ts)
+            self._slots[key] = StreamSlot(batch=batch, received=recv_ts)
+            self.received += 1
+
+    def _run_udp(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                data, _ = self._sock.recvfrom(MAX_UDP_PAYLOAD)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            self._accept(data)
+
+    def _run_tcp_accept(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                conn, addr = self._sock.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            self._workers.spawn(self._run_tcp_conn, f"VisionReceiver-{addr[0]}:{addr[1]}", conn)
+
+    def _run_tcp_conn(self, conn: socket.socket) -> None:
+        conn.settimeout(0.5)
+        buf = bytearray()
+        try:
+            while not self._stop_event.is_set():
+                try:
+                    chunk = conn.recv(65536)
+                except socket.timeout:
+                    continue
+                except OSError:
+                    break
+                if not chunk:
+                    break
+                buf += chunk
+                pos = 0
+                while len(buf) - pos >= FRAME_LEN.size:
+                    (size,) = FRAME_LEN.unpack_from(buf, pos)
+                    if size > MAX_UDP_PAYLOAD:
+                        # No valid batch is this large: the stream is corrupt or not ours.
+                        with self._lock:
+                            self.rejected += 1
+                        return
+                    end = pos + FRAME_LEN.size + size
+                    if len(buf) < end:
+                        break
+                    self._accept(bytes(buf[pos + FRAME_LEN.size:end]))
+                    pos = end
+                del buf[:pos]
+        finally:
+            conn.close()
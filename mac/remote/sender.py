@@ -0,0 +1,83 @@
+import socket
+import time
+from typing import Dict, Iterable, Optional
+
+from vision.types import PersonBatch
+
+from .protocol import FRAME_LEN, encode_batch, encode_id
+
+
+class VisionSender:
+    def __init__(self, config: dict):
+        self.node_id = config.get("node_id", socket.gethostname())
+        encode_id(self.node_id)
+        self.host = config.get("host", "127.0.0.1")
+        self.port = int(config.get("port", 6000))
+        self.transport = config.get("transport", "udp").lower()
+        self.reconnect_interval_s = float(config.get("reconnect_interval_s", 2.0))
+        if self.transport not in ("udp", "tcp"):
+            raise ValueError(f"unsupported remote transport: {self.transport}")
+
+        self._sock: Optional[socket.socket] = None
+        self._seq: Dict[str, int] = {}
+        self._next_connect = 0.0
+        self.sent = 0
+        self.errors = 0
+
+    def check_streams(self, stream_ids: Iterable[str]) -> None:
+        # Stream ids go into a fixed-size batch header; reject long ones before any batch is sent.
+        for stream_id in stream_ids:
+            try:
+                encode_id(str(stream_id))
+            except ValueError as exc:
+                raise ValueError(f"camera {stream_id}: {exc}") from None
+
+    def open(self) -> None:
+        if self._sock is not None:
+            return
+        if self.transport == "udp":
+            self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            return
+        now = time.time()
+        if now < self._next_connect:
+            return
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.settimeout(0.5)
+        try:
+            sock.connect((self.host, self.port))
+        except OSError:
+            sock.close()
+            self._next_connect = now + self.reconnect_interval_s
+            return
+        self._sock = sock
+
+    def close(self) -> None:
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            finally:
+                self._sock = None
+
+    def send(self, vision_results: PersonBatch) -> None:
+        self.open()
+        if self._sock is None:
+            return
+        now = time.time()
+        for idx, stream_id in enumerate(vision_results.streams):
+            seq = self._seq.get(stream_id, 0)
+            self._seq[stream_id] = seq + 1
+            people = vision_results.select(vision_results.stream == idx)
+            payload = encode_batch(self.node_id, stream_id, seq, now, people)
+            try:
+                if self.transport == "udp":
+                    self._sock.sendto(payload, (self.host, self.port))
+                else:
+                    self._sock.sendall(FRAME_LEN.pack(len(payload)) + payload)
+                self.sent += 1
+            except OSError:
+                self.errors += 1
+                if self.transport == "tcp":
+                    self.close()
+                    self._next_connect = now + self.reconnect_interval_s
+                    return
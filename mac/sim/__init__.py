@@ -0,0 +1,4 @@
+from .fleet import Fleet, FleetConfig, cameras_config
+from .overlap import OverlapConfig, OverlapScene
+
+__all__ = ["Fleet", "FleetConfig", "OverlapConfig", "OverlapScene", "cameras_config"]
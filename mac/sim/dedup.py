@@ -0,0 +1,57 @@
+import time
+
+import numpy as np
+
+from fusion import FeatureFusion
+from fusion.floor import FloorConfig, FloorMerger
+from vision.types import PersonBatch, PersonState
+
+from .overlap import OverlapConfig, OverlapScene
+
+
+def check_dedup_chain() -> None:
+    # Camera a sees two people 1.2 apart; b and c each see someone between them. Must stay two people.
+    merger = FloorMerger(FloorConfig(merge_distance=0.6, homographies={s: np.eye(3) for s in "abc"}))
+    layout = {"a": [(0.0, 0.0), (1.2, 0.0)], "b": [(0.4, 0.0)], "c": [(0.8, 0.0)]}
+    states = {
+        stream_id: [PersonState(i, pos, 0.0, False, False, 0.0) for i, pos in enumerate(points)]
+        for stream_id, points in layout.items()
+    }
+    merged = len(merger.merge(PersonBatch.from_states(states)))
+    if merged != 2:
+        raise RuntimeError(f"dedup-test: chained overlap merged into {merged} people, expected 2")
+
+
+def run_dedup_test(
+    fusion_config: dict, people: int, ticks: int = 300, dt: float = 0.1, max_error_ratio: float = 0.02
+) -> None:
+    # Synthetic overlapping cameras with known ground truth; no cameras or MIDI needed.
+    check_dedup_chain()
+    scene = OverlapScene(OverlapConfig(people=people, seed=1))
+    fusion_config = dict(fusion_config)
+    fusion_config["floor"] = {**(fusion_config.get("floor") or {}), **scene.fusion_config()}
+    fusion_engine = FeatureFusion(fusion_config)
+
+    raw_error = 0
+    merged_error = 0
+    visible = 0
+    update_s = 0.0
+    now = time.time()
+    for _ in range(ticks):
+        now += dt
+        tick = scene.step(now, dt)
+        start = time.perf_counter()
+        features = fusion_engine.update(tick.batch, now)
+        update_s += time.perf_counter() - start
+        raw_error += abs(tick.detections - tick.visible)
+        visible += tick.visible
+        merged_error += abs(features.total_people - tick.visible)
+
+    print(
+        f"dedup-test: cameras={len(scene.cameras)} people={people} ticks={ticks} "
+        f"count error per tick raw={raw_error / ticks:.2f} merged={merged_error / ticks:.2f} "
+        f"fusion update={update_s / ticks * 1000:.2f}ms"
+    )
+    bound = max(0.5, max_error_ratio * visible / ticks)
+    if merged_error / ticks > bound:
+        raise RuntimeError(f"dedup-test: merged count error {merged_error / ticks:.2f} per tick exceeds {bound:.2f}")
@@ -0,0 +1,377 @@
+import argparse
+import random
+import socket
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from fractions import Fraction
+from typing import List, Optional
+
+import cv2
+import numpy as np
+
+try:
+    import av
+except Exception:  # pragma: no cover - optional dependency
+    av = None
+
+
+# Mirrors pi-node/stream.sh so the Mac sees the same stream shape as a real node.
+WIDTH = 1280
+HEIGHT = 720
+FRAMERATE = 15
+KEYFRAME_INTERVAL = 30
+BITRATE = 2000000
+PKT_SIZE = 1200
+
+
+@dataclass
+class FleetConfig:
+    nodes: int = 4
+    host: str = "127.0.0.1"
+    base_port: int = 5001
+    bitrate: int = BITRATE
+    framerate: int = FRAMERATE
+    keyframe_interval: int = KEYFRAME_INTERVAL
+    figures: int = 3
+    clip: Optional[str] = None
+    clip_max_frames: int = 300
+    jitter_ms: float = 0.0
+    loss: float = 0.0
+    dropout_every_s: float = 0.0
+    dropout_duration_s: float = 5.0
+    seed: Optional[int] = None
+
+
+@dataclass
+class Figure:
+    x: float
+    y: float
+    vx: float
+    vy: float
+    height: float
+    color: tuple
+    pause_until: float = 0.0
+
+
+class FigureScene:
+    def __init__(self, count: int, rng: random.Random):
+        self._rng = rng
+        self._background = self._make_background(rng)
+        self._figures: List[Figure] = [self._spawn() for _ in range(count)]
+
+    @staticmethod
+    def _make_background(rng: random.Random) -> np.ndarray:
+        base = rng.randint(60, 120)
+        ramp = np.linspace(base, base + 60, HEIGHT, dtype=np.float32)
+        bg = np.repeat(ramp[:, None], WIDTH, axis=1).astype(np.uint8)
+        return cv2.cvtColor(bg, cv2.COLOR_GRAY2BGR)
+
+    def _spawn(self) -> Figure:
+        rng = self._rng
+        speed = rng.choice([0.0, 15.0, 40.0, 90.0])
+        angle = rng.uniform(0, 2 * np.pi)
+        return Figure(
+            x=rng.uniform(100, WIDTH - 100),
+            y=rng.uniform(HEIGHT * 0.45, HEIGHT * 0.85),
+            vx=speed * np.cos(angle),
+            vy=speed * np.sin(angle) * 0.3,
+            height=rng.uniform(180, 320),
+            color=(rng.randint(20, 230), rng.randint(20, 230), rng.randint(20, 230)),
+        )
+
+    def render(self, now: float, dt: float) -> np.ndarray:
+        frame = self._background.copy()
+        for f in self._figures:
+            if now >= f.pause_until:
+                f.x += f.vx * dt
+                f.y += f.vy * dt
+                if self._rng.random() < 0.005:
+                    f.pause_until = now + self._rng.uniform(1.0, 6.0)
+            if f.x < 40 or f.x > WIDTH - 40:
+                f.vx = -f.vx
+            if f.y < HEIGHT * 0.4 or f.y > HEIGHT - 20:
+                f.vy = -f.vy
+            self._draw(frame, f)
+        return frame
+
+    @staticmethod
+    def _draw(frame: np.ndarray, f: Figure) -> None:
+        h = f.height
+        feet = int(f.y)
+        top = int(f.y - h)
+        head_r = int(h * 0.09)
+        body_w = int(h * 0.28)
+        x = int(f.x)
+        cv2.circle(frame, (x, top + head_r), head_r, f.color, -1)
+        cv2.rectangle(frame, (x - body_w // 2, top + 2 * head_r), (x + body_w // 2, int(f.y - h * 0.45)), f.color, -1)
+        cv2.rectangle(frame, (x - body_w // 2, int(f.y - h * 0.45)), (x - 4, feet), f.color, -1)
+        cv2.rectangle(frame, (x + 4, int(f.y - h * 0.45)), (x + body_w // 2, feet), f.color, -1)
+
+
+def load_clip(path: str, max_frames: int) -> List[np.ndarray]:
+    # Decoded once and shared read-only by every node; stored as yuv420p to halve memory.
+    frames: List[np.ndarray] = []
+    with av.open(path) as container:
+        for frame in container.decode(video=0):
+            yuv = frame.reformat(width=WIDTH, height=HEIGHT, format="yuv420p")
+            frames.append(yuv.to_ndarray())
+            if len(frames) >= max_frames:
+                break
+    if not frames:
+        raise RuntimeError(f"No video frames decoded from {path}")
+    return frames
+
+
+@dataclass
+class NodeStats:
+    frames: int = 0
+    bytes_sent: int = 0
+    packets_sent: int = 0
+    packets_dropped: int = 0
+    online: bool = True
+
+
+@dataclass
+class SimNode:
+    node_id: str
+    port: int
+    config: FleetConfig
+    clip: Optional[List[np.ndarray]] = None
+
+    stats: NodeStats = field(default_factory=NodeStats)
+
+    _thread: Optional[threading.Thread] = field(default=None, init=False, repr=False)
+    _stop_event: threading.Event = field(default_factory=threading.Event, init=False, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name=f"SimNode-{self.node_id}", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=2.0)
+
+    def snapshot(self) -> NodeStats:
+        with self._lock:
+            return NodeStats(**vars(self.stats))
+
+    def _open_encoder(self):
+        cfg = self.config
+        ctx = av.CodecContext.create("libx264", "w")
+        ctx.width = WIDTH
+        ctx.height = HEIGHT
+        ctx.pix_fmt = "yuv420p"
+        ctx.framerate = Fraction(cfg.framerate)
+        ctx.time_base = Fraction(1, cfg.framerate)
+        ctx.bit_rate = cfg.bitrate
+        ctx.gop_size = cfg.keyframe_interval
+        ctx.options = {
+            "preset": "veryfast",
+            "tune": "zerolatency",
+            "x264-params": (
+                f"keyint={cfg.keyframe_interval}:min-keyint={cfg.keyframe_interval}:"
+                "scenecut=0:repeat-headers=1"
+            ),
+        }
+        ctx.open()
+        return ctx
+
+    def _run(self) -> None:
+        cfg = self.config
+        seed = None if cfg.seed is None else cfg.seed + self.port
+        rng = random.Random(seed)
+        scene = None if self.clip else FigureScene(cfg.figures, rng)
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        dest = (cfg.host, self.port)
+        frame_dt = 1.0 / cfg.framerate
+
+        encoder = self._open_encoder()
+        pts = 0
+        clip_idx = rng.randrange(len(self.clip)) if self.clip else 0
+        next_frame = time.monotonic()
+        next_dropout = self._schedule_dropout(rng, next_frame)
+
+        try:
+            while not self._stop_event.is_set():
+                now = time.monotonic()
+                if now < next_frame:
+                    time.sleep(next_frame - now)
+                    continue
+                next_frame += frame_dt
+                if now - next_frame > 1.0:
+                    next_frame = now
+
+                if next_dropout is not None and now >= next_dropout:
+                    # A dropped node is a restarted service: go silent, then come back with a fresh encoder.
+                    self._set_online(False)
+                    self._stop_event.wait(cfg.dropout_duration_s * rng.uniform(0.5, 1.5))
+                    encoder = self._open_encoder()
+                    pts = 0
+                    next_frame = time.monotonic()
+                    next_dropout = self._schedule_dropout(rng, next_frame)
+                    self._set_online(True)
+                    continue
+
+                if self.clip:
+                    video_frame = av.VideoFrame.from_ndarray(self.clip[clip_idx], format="yuv420p")
+                    clip_idx = (clip_idx + 1) % len(self.clip)
+                else:
+                    video_frame = av.VideoFrame.from_ndarray(scene.render(now, frame_dt), format="bgr24")
+                video_frame.pts = pts
+                pts += 1
+
+                payload = b"".join(bytes(p) for p in encoder.encode(video_frame))
+                if cfg.jitter_ms > 0:
+                    time.sleep(rng.uniform(0.0, cfg.jitter_ms) / 1000.0)
+                self._send(sock, dest, payload, rng)
+        finally:
+            sock.close()
+
+    def _send(self, sock: socket.socket, dest, payload: bytes, rng: random.Random) -> None:
+        sent = dropped = sent_bytes = 0
+        for offset in range(0, len(payload), PKT_SIZE):
+            chunk = payload[offset:offset + PKT_SIZE]
+            if self.config.loss > 0 and rng.random() < self.config.loss:
+                dropped += 1
+                continue
+            try:
+                sock.sendto(chunk, dest)
+            except OSError:
+                dropped += 1
+                continue
+            sent += 1
+            sent_bytes += len(chunk)
+        with self._lock:
+            self.stats.frames += 1
+            self.stats.packets_sent += sent
+            self.stats.packets_dropped += dropped
+            self.stats.bytes_sent += sent_bytes
+
+    def _schedule_dropout(self, rng: random.Random, now: float) -> Optional[float]:
+        if self.config.dropout_every_s <= 0:
+            return None
+        return now + rng.expovariate(1.0 / self.config.dropout_every_s)
+
+    def _set_online(self, online: bool) -> None:
+        with self._lock:
+            self.stats.online = online
+
+
+def cameras_config(config: FleetConfig) -> List[dict]:
+    return [
+        {
+            "id": f"cam{i + 1:02d}",
+            "protocol": "udp",
+            "udp_port": config.base_port + i,
+            "use_pyav": True,
+            "reconnect_interval_s": 2.0,
+        }
+        for i in range(config.nodes)
+    ]
+
+
+class Fleet:
+    def __init__(self, config: FleetConfig):
+        if av is None:
+            raise RuntimeError("PyAV is not installed. Install with: pip install av")
+        self.config = config
+        clip = load_clip(config.clip, config.clip_max_frames) if config.clip else None
+        self._nodes: List[SimNode] = [
+            SimNode(node_id=cam["id"], port=cam["udp_port"], config=config, clip=clip)
+            for cam in cameras_config(config)
+        ]
+
+    def start(self) -> None:
+        for node in self._nodes:
+            node.start()
+
+    def stop(self) -> None:
+        for node in self._nodes:
+            node.stop()
+
+    def snapshot(self) -> List[NodeStats]:
+        return [node.snapshot() for node in self._nodes]
+
+
+def run(config: FleetConfig) -> None:
+    fleet = Fleet(config)
+    fleet.start()
+    print(f"fleet: {config.nodes} nodes -> {config.host}:{config.base_port}..{config.base_port + config.nodes - 1}")
+
+    last = fleet.snapshot()
+    last_time = time.time()
+    try:
+        while True:
+            time.sleep(1.0)
+            now = time.time()
+            current = fleet.snapshot()
+            elapsed = max(1e-3, now - last_time)
+            frames = sum(c.frames - p.frames for c, p in zip(current, last))
+            kbps = sum(c.bytes_sent - p.bytes_sent for c, p in zip(current, last)) * 8 / 1000.0 / elapsed
+            dropped = sum(c.packets_dropped - p.packets_dropped for c, p in zip(current, last))
+            online = sum(1 for c in current if c.online)
+            print(
+                "fleet: "
+                f"online={online}/{len(current)} "
+                f"fps={frames / elapsed / max(1, online):.1f} "
+                f"kbps={kbps:.0f} "
+                f"dropped_pkts={dropped}"
+            )
+            last = current
+            last_time = now
+    except KeyboardInterrupt:
+        pass
+    finally:
+        fleet.stop()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Simulate a fleet of Pi camera nodes streaming H.264 over UDP")
+    parser.add_argument("--nodes", type=int, default=4, help="Number of simulated nodes")
+    parser.add_argument("--host", default="127.0.0.1", help="Destination host")
+    parser.add_argument("--base-port", type=int, default=5001, help="UDP port of the first node")
+    parser.add_argument("--bitrate", type=int, default=BITRATE, help="Encoder bitrate in bits/s")
+    parser.add_argument("--figures", type=int, default=3, help="Moving figures per rendered scene")
+    parser.add_argument("--clip", default="", help="Loop this video file instead of rendering figures")
+    parser.add_argument("--clip-max-frames", type=int, default=300, help="Frames of --clip to cache")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Random send delay per frame")
+    parser.add_argument("--loss", type=float, default=0.0, help="UDP packet loss probability (0..1)")
+    parser.add_argument("--dropout-every-s", type=float, default=0.0, help="Mean seconds between node dropouts (0=off)")
+    parser.add_argument("--dropout-duration-s", type=float, default=5.0, help="Mean dropout length")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed")
+    parser.add_argument("--print-config", action="store_true", help="Print a matching cameras: block and exit")
+    args = parser.parse_args(argv)
+
+    config = FleetConfig(
+        nodes=args.nodes,
+        host=args.host,
+        base_port=args.base_port,
+        bitrate=args.bitrate,
+        figures=args.figures,
+        clip=args.clip or None,
+        clip_max_frames=args.clip_max_frames,
+        jitter_ms=args.jitter_ms,
+        loss=args.loss,
+        dropout_every_s=args.dropout_every_s,
+        dropout_duration_s=args.dropout_duration_s,
+        seed=args.seed,
+    )
+
+    if args.print_config:
+        import yaml
+
+        yaml.safe_dump({"cameras": cameras_config(config)}, sys.stdout, sort_keys=False)
+        return
+
+    run(config)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from fusion.floor import compute_homography, project
+from vision.types import PersonBatch
+
+
+FRAME_W = 1280
+FRAME_H = 720
+PERSON_HEIGHT = 1.7  # metres
+
+
+@dataclass
+class OverlapConfig:
+    cameras: int = 3
+    people: int = 12
+    floor_w: float = 12.0  # metres
+    floor_d: float = 6.0
+    overlap: float = 0.35  # fraction of each camera's view shared with its neighbour
+    pixel_noise: float = 6.0
+    time_jitter_s: float = 0.05
+    seed: Optional[int] = None
+
+
+@dataclass
+class OverlapTick:
+    batch: PersonBatch
+    visible: int  # distinct people seen by at least one camera
+    detections: int
+
+
+@dataclass
+class SimCamera:
+    stream_id: str
+    floor_to_image: np.ndarray
+    view: Tuple[float, float, float, float]  # floor x0, y0, x1, y1
+    calibration: Dict[str, List[List[float]]] = field(default_factory=dict)
+
+
+class OverlapScene:
+    # People walking on a shared floor, seen by a row of cameras whose views overlap. Cameras alternate
+    # between the two long walls, so neighbours see people from opposite sides.
+    def __init__(self, cfg: OverlapConfig):
+        self.cfg = cfg
+        self._rng = np.random.default_rng(cfg.seed)
+        self.cameras = self._make_cameras()
+        self._pos = self._rng.uniform((0, 0), (cfg.floor_w, cfg.floor_d), size=(cfg.people, 2))
+        self._vel = self._rng.normal(0.0, 0.6, size=(cfg.people, 2))
+        self._tracks = np.arange(cfg.people, dtype=np.int64) * 10
+
+    def fusion_config(self) -> dict:
+        return {"cameras": {cam.stream_id: dict(cam.calibration) for cam in self.cameras}}
+
+    def step(self, now: float, dt: float) -> OverlapTick:
+        cfg = self.cfg
+        self._vel += self._rng.normal(0.0, 0.3, size=self._vel.shape) * dt
+        self._pos += self._vel * dt
+        # Bounce off the walls.
+        for axis, limit in ((0, cfg.floor_w), (1, cfg.floor_d)):
+            out = (self._pos[:, axis] < 0) | (self._pos[:, axis] > limit)
+            self._vel[out, axis] *= -1
+            self._pos[:, axis] = np.clip(self._pos[:, axis], 0, limit)
+
+        batches = []
+        seen = np.zeros(cfg.people, dtype=bool)
+        for cam in self.cameras:
+            x0, y0, x1, y1 = cam.view
+            inside = (
+                (self._pos[:, 0] >= x0) & (self._pos[:, 0] <= x1) & (self._pos[:, 1] >= y0) & (self._pos[:, 1] <= y1)
+            )
+            seen |= inside
+            feet = project(cam.floor_to_image, self._pos[inside])
+            feet += self._rng.normal(0.0, cfg.pixel_noise, size=feet.shape)
+            # Detectors report the box centre, half a body above the feet. Body height in pixels follows the
+            # floor's scale across the image at the feet (a person is about as tall as 1.7 m of floor is wide).
+            side = project(cam.floor_to_image, self._pos[inside] + (PERSON_HEIGHT, 0.0))
+            height = np.abs(side[:, 0] - project(cam.floor_to_image, self._pos[inside])[:, 0])
+            n = len(feet)
+            batches.append(
+                PersonBatch(
+                    streams=[cam.stream_id],
+                    track_id=self._tracks[inside],
+                    x=feet[:, 0].astype(np.float32),
+                    y=(feet[:, 1] - height / 2.0).astype(np.float32),
+                    foot_y=feet[:, 1].astype(np.float32),
+                    velocity=np.linalg.norm(self._vel[inside], axis=1).astype(np.float32),
+                    stationary=np.zeros(n, dtype=np.bool_),
+                    has_phone=self._rng.random(n) < 0.1,
+                    last_seen=now - self._rng.uniform(0.0, cfg.time_jitter_s, size=n),
+                    stream=np.zeros(n, dtype=np.int32),
+                )
+            )
+        batch = PersonBatch.concat(batches)
+        return OverlapTick(batch=batch, visible=int(seen.sum()), detections=len(batch))
+
+    def _make_cameras(self) -> List[SimCamera]:
+        cfg = self.cfg
+        span = cfg.floor_w / (cfg.cameras - (cfg.cameras - 1) * cfg.overlap)
+        step = span * (1.0 - cfg.overlap)
+        cameras = []
+        for i in range(cfg.cameras):
+            x0 = i * step
+            view = (x0, 0.0, min(x0 + span, cfg.floor_w), cfg.floor_d)
+            # Far edge of the floor appears narrower, like a camera mounted high on a wall.
+            inset = self._rng.uniform(0.1, 0.25) * FRAME_W
+            image_corners = [[inset, 0], [FRAME_W - inset, 0], [FRAME_W, FRAME_H], [0, FRAME_H]]
+            floor_corners = [[view[0], view[1]], [view[2], view[1]], [view[2], view[3]], [view[0], view[3]]]
+            if i % 2:
+                floor_corners = floor_corners[2:] + floor_corners[:2]
+            h = compute_homography(floor_corners, image_corners)
+
+            # Calibration as a person would do it: a few floor marks clicked in the image, slightly off.
+            marks = np.array(
+                [[view[0] + fx * (view[2] - view[0]), view[1] + fy * (view[3] - view[1])] for fx in (0.1, 0.5, 0.9) for fy in (0.15, 0.85)]
+            )
+            clicked = project(h, marks) + self._rng.normal(0.0, 2.0, size=marks.shape)
+            calibration = {
+                "image_points": np.round(clicked, 1).tolist(),
+                "floor_points": np.round(marks, 3).tolist(),
+            }
+            cameras.append(SimCamera(stream_id=f"cam{i + 1:02d}", floor_to_image=h, view=view, calibration=calibration))
+        return cameras
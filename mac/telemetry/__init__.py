@@ -0,0 +1,3 @@
+from .log import FEATURES_DTYPE, PEOPLE_DTYPE, TelemetryWriter, load_day
+
+__all__ = ["FEATURES_DTYPE", "PEOPLE_DTYPE", "TelemetryWriter", "load_day"]
@@ -0,0 +1,273 @@
+import json
+import os
+import queue
+import struct
+import threading
+import time
+from dataclasses import dataclass
+from typing import BinaryIO, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from fusion.features import GlobalFeatures
+from vision.types import PersonBatch
+
+
+MAGIC = b"VDTL"
+VERSION = 1
+# magic, version, kind, record size; padded to HEADER_BYTES so records start at a fixed offset.
+HEADER = struct.Struct("<4sBBI")
+HEADER_BYTES = 64
+# One JSON-encoded stream name per line; people records store the line number. Shared by a day's segments.
+STREAMS_FILE = "streams.txt"
+
+KIND_PEOPLE = 1
+KIND_FEATURES = 2
+
+PEOPLE_DTYPE = np.dtype(
+    [
+        ("ts", "<f8"),
+        ("tick", "<u4"),
+        ("stream", "<u2"),  # index into the day's streams.txt
+        ("track_id", "<u4"),
+        ("x", "<f4"),
+        ("y", "<f4"),
+        ("velocity", "<f4"),
+        ("flags", "u1"),
+    ]
+)
+FEATURES_DTYPE = np.dtype(
+    [
+        ("ts", "<f8"),
+        ("tick", "<u4"),
+        ("total_people", "<u4"),
+        ("movement_energy", "<f4"),
+        ("stationary_ratio", "<f4"),
+        ("phone_ratio", "<f4"),
+        ("slow_count", "<u2"),
+        ("medium_count", "<u2"),
+        ("fast_count", "<u2"),
+        ("spatial_spread", "<f4"),
+        ("hotspot_x", "<f4"),
+        ("hotspot_y", "<f4"),
+    ]
+)
+KINDS = {KIND_PEOPLE: ("people", PEOPLE_DTYPE), KIND_FEATURES: ("features", FEATURES_DTYPE)}
+
+
+def day_of(ts: float) -> str:
+    return time.strftime("%Y-%m-%d", time.localtime(ts))
+
+
+def people_records(ts: float, tick: int, batch: PersonBatch, stream_index: np.ndarray) -> np.ndarray:
+    # stream_index maps batch.streams positions to indices in the day's stream table.
+    records = np.empty(len(batch), dtype=PEOPLE_DTYPE)
+    records["ts"] = ts
+    records["tick"] = tick
+    records["stream"] = stream_index[batch.stream]
+    records["track_id"] = batch.track_id
+    records["x"] = batch.x
+    records["y"] = batch.y
+    records["velocity"] = batch.velocity
+    records["flags"] = batch.flags()
+    return records
+
+
+def features_record(ts: float, tick: int, features: GlobalFeatures) -> np.ndarray:
+    record = np.zeros(1, dtype=FEATURES_DTYPE)
+    record["ts"] = ts
+    record["tick"] = tick
+    record["total_people"] = features.total_people
+    record["movement_energy"] = features.movement_energy
+    record["stationary_ratio"] = features.stationary_ratio
+    record["phone_ratio"] = features.phone_ratio
+    record["slow_count"] = features.slow_count
+    record["medium_count"] = features.medium_count
+    record["fast_count"] = features.fast_count
+    record["spatial_spread"] = features.spatial_spread
+    record["hotspot_x"] = features.hotspot_x
+    record["hotspot_y"] = features.hotspot_y
+    return record
+
+
+@dataclass
+class Segment:
+    day: str
+    index: int
+    files: Dict[int, BinaryIO]
+    streams: Dict[str, int]
+    streams_file: BinaryIO
+    size: int = 0
+
+    def stream_index(self, names: List[str]) -> np.ndarray:
+        # New names are appended (and flushed) before any record refers to them.
+        added = False
+        for name in names:
+            if name not in self.streams:
+                self.streams[name] = len(self.streams)
+                self.streams_file.write(json.dumps(name).encode("utf-8") + b"\n")
+                added = True
+        if added:
+            self.streams_file.flush()
+        return np.array([self.streams[name] for name in names], dtype=np.uint16)
+
+
+class TelemetryWriter:
+    def __init__(self, config: dict):
+        self.enabled = bool(config.get("enabled", False))
+        self.directory = config.get("dir", "telemetry")
+        self.max_bytes = int(config.get("max_bytes", 256 * 1024 * 1024))
+        self.flush_interval_s = float(config.get("flush_interval_s", 1.0))
+        self.queue_size = int(config.get("queue_size", 1024))
+
+        self._queue: "queue.Queue[Tuple[float, int, PersonBatch, GlobalFeatures]]" = queue.Queue(self.queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._segment: Optional[Segment] = None
+        self._tick = 0
+        self.dropped = 0
+        self.written = 0
+
+    def start(self) -> None:
+        if not self.enabled or (self._thread and self._thread.is_alive()):
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="TelemetryWriter", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5.0)
+            self._thread = None
+
+    def log(self, ts: float, batch: PersonBatch, features: GlobalFeatures) -> None:
+        # Hot path: hand the (immutable) batch to the writer thread; never block the tick.
+        if not self.enabled:
+            return
+        self._tick += 1
+        try:
+            self._queue.put_nowait((ts, self._tick, batch, features))
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self) -> None:
+        next_flush = time.time() + self.flush_interval_s
+        try:
+            while not (self._stop_event.is_set() and self._queue.empty()):
+                try:
+                    ts, tick, batch, features = self._queue.get(timeout=0.2)
+                except queue.Empty:
+                    ts = None
+                if ts is not None:
+                    self._write(ts, tick, batch, features)
+                now = time.time()
+                if now >= next_flush and self._segment is not None:
+                    for f in self._segment.files.values():
+                        f.flush()
+                    next_flush = now + self.flush_interval_s
+        finally:
+            self._close_segment()
+
+    def _write(self, ts: float, tick: int, batch: PersonBatch, features: GlobalFeatures) -> None:
+        day = day_of(ts)
+        segment = self._segment
+        if segment is None or segment.day != day or segment.size >= self.max_bytes:
+            index = segment.index + 1 if segment is not None and segment.day == day else None
+            segment = self._open_segment(day, index)
+        people = people_records(ts, tick, batch, segment.stream_index(batch.streams))
+        for kind, records in ((KIND_PEOPLE, people), (KIND_FEATURES, features_record(ts, tick, features))):
+            data = records.tobytes()
+            segment.files[kind].write(data)
+            segment.size += len(data)
+        self.written += 1
+
+    def _open_segment(self, day: str, index: Optional[int]) -> Segment:
+        self._close_segment()
+        day_dir = os.path.join(self.directory, day)
+        os.makedirs(day_dir, exist_ok=True)
+        if index is None:
+            existing = list_segments(self.directory, day)
+            index = existing[-1] + 1 if existing else 0
+        files: Dict[int, BinaryIO] = {}
+        for kind, (name, dtype) in KINDS.items():
+            f = open(os.path.join(day_dir, f"{name}-{index:04d}.bin"), "ab")
+            if f.tell() == 0:
+                f.write(HEADER.pack(MAGIC, VERSION, kind, dtype.itemsize).ljust(HEADER_BYTES, b"\0"))
+            files[kind] = f
+        streams = {name: i for i, name in enumerate(read_streams(day_dir))}
+        streams_file = open(os.path.join(day_dir, STREAMS_FILE), "ab")
+        self._segment = Segment(day=day, index=index, files=files, streams=streams, streams_file=streams_file)
+        return self._segment
+
+    def _close_segment(self) -> None:
+        if self._segment is None:
+            return
+        for f in self._segment.files.values():
+            f.close()
+        self._segment.streams_file.close()
+        self._segment = None
+
+
+def read_streams(day_dir: str) -> List[str]:
+    # A torn last line (crash mid-append) is ignored; no record can refer to it yet.
+    path = os.path.join(day_dir, STREAMS_FILE)
+    if not os.path.exists(path):
+        return []
+    streams: List[str] = []
+    with open(path, "rb") as f:
+        for line in f:
+            try:
+                streams.append(json.loads(line))
+            except ValueError:
+                break
+    return streams
+
+
+def list_segments(directory: str, day: str) -> List[int]:
+    day_dir = os.path.join(directory, day)
+    if not os.path.isdir(day_dir):
+        return []
+    indices = []
+    for name in os.listdir(day_dir):
+        if name.startswith("features-") and name.endswith(".bin"):
+            indices.append(int(name[len("features-"):-len(".bin")]))
+    return sorted(indices)
+
+
+def open_segment(path: str, kind: int) -> np.ndarray:
+    # Read-only memmap of every complete record; a torn trailing record is ignored.
+    _, dtype = KINDS[kind]
+    with open(path, "rb") as f:
+        magic, version, file_kind, record_size = HEADER.unpack(f.read(HEADER.size))
+    if magic != MAGIC or version != VERSION or file_kind != kind or record_size != dtype.itemsize:
+        raise ValueError(f"{path}: not a version {VERSION} telemetry file of kind {kind}")
+    count = (os.path.getsize(path) - HEADER_BYTES) // dtype.itemsize
+    if count <= 0:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", offset=HEADER_BYTES, shape=(count,))
+
+
+def load_day(directory: str, day: str) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+    # Returns (people, features, streams) for one day (YYYY-MM-DD); people["stream"] indexes streams.
+    # Unreadable segments are skipped with a warning so one bad file does not hide the rest of the day.
+    people: List[np.ndarray] = []
+    features: List[np.ndarray] = []
+    day_dir = os.path.join(directory, day)
+    streams = read_streams(day_dir)
+    for index in list_segments(directory, day):
+        try:
+            segment_people = open_segment(os.path.join(day_dir, f"people-{index:04d}.bin"), KIND_PEOPLE)
+            segment_features = open_segment(os.path.join(day_dir, f"features-{index:04d}.bin"), KIND_FEATURES)
+        except (OSError, ValueError, struct.error) as exc:
+            print(f"telemetry: skipping segment {day}/{index:04d} ({exc})")
+            continue
+        people.append(segment_people)
+        features.append(segment_features)
+    if len(people) == 1:
+        return people[0], features[0], streams
+    return (
+        np.concatenate(people) if people else np.empty(0, dtype=PEOPLE_DTYPE),
+        np.concatenate(features) if features else np.empty(0, dtype=FEATURES_DTYPE),
+        streams,
+    )
@@ -1,4 +1,4 @@
 from .engine import VisionEngine
-from .types import PersonState
+from .types import PersonBatch, PersonState
 
-__all__ = ["VisionEngine", "PersonState"]
+__all__ = ["VisionEngine", "PersonBatch", "PersonState"]
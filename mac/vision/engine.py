@@ -1,182 +1,379 @@
-import math
 import time
 from dataclasses import dataclass, field
 from typing import Dict, List, Optional, Tuple
 
-import cv2
+import numpy as np
 
-from .types import PersonState
+from .motion import MotionDetector, parse_masks
+from .types import PersonBatch
+
+
+def _empty(dtype) -> np.ndarray:
+    return np.empty(0, dtype=dtype)
+
+
+@dataclass
+class Detections:
+    positions: np.ndarray = field(default_factory=lambda: np.empty((0, 2), np.float32))  # (N, 2) box centres
+    foot_y: np.ndarray = field(default_factory=lambda: _empty(np.float32))  # (N,) box bottom edges
+    has_phone: np.ndarray = field(default_factory=lambda: _empty(np.bool_))
+
+    def __len__(self) -> int:
+        return len(self.positions)
 
 
 @dataclass
-class TrackData:
-    state: PersonState
-    last_position: Tuple[float, float]
-    last_time: float
-    velocity_ema: float
+class TrackTable:
+    # One stream's live tracks as columns in PersonBatch dtypes. Updates build new arrays, never write
+    # in place, so a PersonBatch can share them safely.
+    track_id: np.ndarray = field(default_factory=lambda: _empty(np.int64))
+    x: np.ndarray = field(default_factory=lambda: _empty(np.float32))
+    y: np.ndarray = field(default_factory=lambda: _empty(np.float32))
+    foot_y: np.ndarray = field(default_factory=lambda: _empty(np.float32))
+    velocity: np.ndarray = field(default_factory=lambda: _empty(np.float32))  # EMA
+    stationary: np.ndarray = field(default_factory=lambda: _empty(np.bool_))
+    has_phone: np.ndarray = field(default_factory=lambda: _empty(np.bool_))
+    last_seen: np.ndarray = field(default_factory=lambda: _empty(np.float64))
+    phone_ema: np.ndarray = field(default_factory=lambda: _empty(np.float32))
+
+    COLUMNS = ("track_id", "x", "y", "foot_y", "velocity", "stationary", "has_phone", "last_seen", "phone_ema")
+
+    def __len__(self) -> int:
+        return len(self.track_id)
 
 
 class VisionEngine:
     def __init__(self, config: dict):
-        self.detector = config.get("detector", "motion")
-        self.model_name = config.get("model", "yolov8n.pt")
-        self.conf = float(config.get("conf", 0.4))
-        self.iou = float(config.get("iou", 0.5))
-
-        self.detection_interval_s = float(config.get("detection_interval_s", 0.2))
-        self.min_area = int(config.get("min_area", 800))
-        self.distance_threshold = float(config.get("distance_threshold", 60.0))
-        self.max_lost_s = float(config.get("max_lost_s", 1.5))
-        self.ema_alpha = float(config.get("ema_alpha", 0.4))
-        self.stationary_threshold = float(config.get("stationary_threshold", 5.0))
+        self._apply_settings(self.parse_config(config))
 
         self._next_track_id = 1
         self._last_detection_time: Dict[str, float] = {}
-        self._trackers: Dict[str, Dict[int, TrackData]] = {}
-        self._bg_subs: Dict[str, cv2.BackgroundSubtractor] = {}
-        self._last_boxes: Dict[str, List[Tuple[int, int, int, int]]] = {}
+        self._trackers: Dict[str, TrackTable] = {}
+        self._motion: Dict[str, MotionDetector] = {}
+        self._motion_energy: Dict[str, float] = {}
+        self._last_boxes: Dict[str, np.ndarray] = {}
+        self._last_phone_boxes: Dict[str, np.ndarray] = {}
         self._yolo = None
+        self._service = None
+        self._service_ok = True
+        try:
+            detector = self._open_detector(self.requested_detector, self.model_name, config)
+        except Exception as exc:
+            if self.requested_detector != "yolo":
+                raise
+            print(f"vision: failed to load YOLO ({exc}); falling back to motion detector")
+            detector = ("motion", None, None)
+        self._install_detector(*detector)
 
-        if self.detector == "yolo":
-            try:
-                from ultralytics import YOLO
+    @staticmethod
+    def parse_config(config: dict) -> dict:
+        detector = config.get("detector", "motion")
+        if detector not in ("motion", "yolo", "yolo_service"):
+            raise ValueError(f"unknown vision detector: {detector}")
+        return {
+            "requested_detector": detector,
+            "model_name": config.get("model", "yolov8n.pt"),
+            "inference_socket": config.get("inference_socket"),
+            "conf": float(config.get("conf", 0.4)),
+            "iou": float(config.get("iou", 0.5)),
+            "detection_interval_s": float(config.get("detection_interval_s", 0.2)),
+            "min_area": int(config.get("min_area", 800)),
+            "distance_threshold": float(config.get("distance_threshold", 60.0)),
+            "max_lost_s": float(config.get("max_lost_s", 1.5)),
+            "ema_alpha": float(config.get("ema_alpha", 0.4)),
+            "stationary_threshold": float(config.get("stationary_threshold", 5.0)),
+            "motion_width": int(config.get("motion_width", 320)),
+            "motion_history": int(config.get("motion_history", 200)),
+            "motion_masks": parse_masks(config.get("motion_masks", {})),
+            "person_class": int(config.get("person_class", 0)),
+            "phone_class": int(config.get("phone_class", 67)),
+            "phone_conf": float(config.get("phone_conf", 0.25)),
+            "phone_upper_ratio": float(config.get("phone_upper_ratio", 0.6)),
+            "phone_min_overlap": float(config.get("phone_min_overlap", 0.5)),
+            "phone_ema_alpha": float(config.get("phone_ema_alpha", 0.3)),
+            "phone_threshold": float(config.get("phone_threshold", 0.5)),
+        }
+
+    def reconfigure(self, config: dict) -> None:
+        # Tracks and the loaded model survive; the detector reloads only if its identity changed. A new
+        # model is loaded before anything is replaced, so a failed load raises with the old one still running.
+        settings = self.parse_config(config)
+        detector = None
+        detector_key = (self.requested_detector, self.model_name, self.inference_socket)
+        if (settings["requested_detector"], settings["model_name"], settings["inference_socket"]) != detector_key:
+            detector = self._open_detector(settings["requested_detector"], settings["model_name"], config)
+        motion_key = self._motion_key()
+        self._apply_settings(settings)
+        if detector is not None:
+            self._install_detector(*detector)
+        if self._motion_key() != motion_key:
+            self._motion.clear()
+        for motion in self._motion.values():
+            motion.min_area = self.min_area
+
+    def _motion_key(self) -> tuple:
+        masks = tuple(sorted((sid, tuple(p.tobytes() for p in polys)) for sid, polys in self.motion_masks.items()))
+        return self.motion_width, self.motion_history, masks
 
-                self._yolo = YOLO(self.model_name)
-            except Exception as exc:
-                print(f"vision: failed to load YOLO ({exc}); falling back to motion detector")
-                self.detector = "motion"
+    def _apply_settings(self, settings: dict) -> None:
+        for name, value in settings.items():
+            setattr(self, name, value)
 
-    def process(self, frames: Dict[str, dict]) -> Dict[str, List[PersonState]]:
-        results: Dict[str, List[PersonState]] = {}
-        for stream_id, payload in frames.items():
+    @staticmethod
+    def _open_detector(requested: str, model_name: str, config: dict) -> Tuple[str, object, object]:
+        # Returns (detector, yolo model, inference client); raises if the model cannot be loaded.
+        if requested == "yolo_service":
+            from inference import InferenceClient
+
+            return requested, None, InferenceClient(config)
+        if requested == "yolo":
+            from ultralytics import YOLO
+
+            return requested, YOLO(model_name), None
+        return "motion", None, None
+
+    def _install_detector(self, detector: str, yolo, service) -> None:
+        if self._service is not None and self._service is not service:
+            self._service.close()
+        self.detector = detector
+        self._yolo = yolo
+        self._service = service
+
+    def process(self, frames: Dict[str, dict]) -> PersonBatch:
+        streams = list(frames.keys())
+        tables: List[TrackTable] = []
+        stream_index: List[int] = []
+        for idx, (stream_id, payload) in enumerate(frames.items()):
             frame = payload.get("frame")
             ts = payload.get("timestamp") or time.time()
             if frame is None:
-                results[stream_id] = []
                 continue
 
-            tracks = self._trackers.setdefault(stream_id, {})
-            bg = self._bg_subs.setdefault(stream_id, cv2.createBackgroundSubtractorMOG2(history=200, detectShadows=False))
             last_det = self._last_detection_time.get(stream_id, 0.0)
 
-            detections: List[Tuple[float, float]] = []
+            detections = Detections()
             if (ts - last_det) >= self.detection_interval_s:
-                if self.detector == "yolo" and self._yolo is not None:
+                if self._yolo is not None or self._service is not None:
                     detections = self._detect_people_yolo(stream_id, frame)
                 else:
-                    detections = self._detect_motion(stream_id, frame, bg)
+                    detections = self._detect_motion(stream_id, frame)
                 self._last_detection_time[stream_id] = ts
 
-            self._update_tracks(tracks, detections, ts)
-            results[stream_id] = [t.state for t in tracks.values()]
+            tracks = self._update_tracks(self._trackers.get(stream_id) or TrackTable(), detections, ts)
+            self._trackers[stream_id] = tracks
+            tables.append(tracks)
+            stream_index.append(idx)
+
+        return self._batch(streams, tables, stream_index)
 
-        return results
+    @staticmethod
+    def _batch(streams: List[str], tables: List[TrackTable], stream_index: List[int]) -> PersonBatch:
+        # Column-wise concatenation of the stream tables; no per-person Python. Tables are never written
+        # in place, so a single table's columns are shared rather than copied.
+        if len(tables) == 1:
+            t = tables[0]
+            return PersonBatch(
+                streams=streams,
+                track_id=t.track_id,
+                x=t.x,
+                y=t.y,
+                foot_y=t.foot_y,
+                velocity=t.velocity,
+                stationary=t.stationary,
+                has_phone=t.has_phone,
+                last_seen=t.last_seen,
+                stream=np.full(len(t), stream_index[0], dtype=np.int32),
+            )
+        if not tables:
+            return PersonBatch(streams=streams)
+        columns = [np.concatenate([getattr(t, name) for t in tables]) for name in PersonBatch.COLUMNS[:-1]]
+        stream = np.repeat(np.asarray(stream_index, dtype=np.int32), [len(t) for t in tables])
+        return PersonBatch(streams, *columns, stream)
+
+    def drop_stream(self, stream_id: str) -> None:
+        for state in (
+            self._trackers,
+            self._motion,
+            self._motion_energy,
+            self._last_detection_time,
+            self._last_boxes,
+            self._last_phone_boxes,
+        ):
+            state.pop(stream_id, None)
 
     def get_last_boxes(self, stream_id: str) -> List[Tuple[int, int, int, int]]:
-        return self._last_boxes.get(stream_id, [])
-
-    def _detect_motion(self, stream_id: str, frame, bg) -> List[Tuple[float, float]]:
-        fg = bg.apply(frame)
-        fg = cv2.medianBlur(fg, 5)
-        _, th = cv2.threshold(fg, 200, 255, cv2.THRESH_BINARY)
-        th = cv2.dilate(th, None, iterations=2)
-        contours, _ = cv2.findContours(th, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        points: List[Tuple[float, float]] = []
-        boxes: List[Tuple[int, int, int, int]] = []
-        for c in contours:
-            area = cv2.contourArea(c)
-            if area < self.min_area:
-                continue
-            x, y, w, h = cv2.boundingRect(c)
-            cx = x + w / 2.0
-            cy = y + h / 2.0
-            points.append((cx, cy))
-            boxes.append((x, y, w, h))
+        boxes = self._last_boxes.get(stream_id)
+        return [] if boxes is None else [tuple(b) for b in boxes.tolist()]
+
+    def get_last_phone_boxes(self, stream_id: str) -> List[Tuple[int, int, int, int]]:
+        boxes = self._last_phone_boxes.get(stream_id)
+        return [] if boxes is None else [tuple(b) for b in boxes.tolist()]
+
+    def get_motion_energy(self, stream_id: str) -> float:
+        # Fraction of the (unmasked) view that changed at the last motion detection; 0 in YOLO modes.
+        return self._motion_energy.get(stream_id, 0.0)
+
+    def _detect_motion(self, stream_id: str, frame) -> Detections:
+        motion = self._motion.get(stream_id)
+        if motion is None:
+            motion = MotionDetector(
+                width=self.motion_width,
+                history=self.motion_history,
+                min_area=self.min_area,
+                ignore=self.motion_masks.get(stream_id, ()),
+            )
+            self._motion[stream_id] = motion
+        result = motion.detect(frame)
+        boxes = np.asarray(result.boxes, dtype=np.int32).reshape(-1, 4)
+        self._last_boxes[stream_id] = boxes
+        self._motion_energy[stream_id] = result.energy
+        return detections_from_boxes(boxes, np.zeros(len(boxes), dtype=np.bool_))
+
+    def _detect_people_yolo(self, stream_id: str, frame) -> Detections:
+        xyxy, cls, conf = self._infer(frame)
+        people = xyxy[(cls == self.person_class) & (conf >= self.conf)]
+        phones = xyxy[(cls == self.phone_class) & (conf >= self.phone_conf)]
+        has_phone = associate_phones(people, phones, self.phone_upper_ratio, self.phone_min_overlap)
+
+        boxes = xywh_boxes(people)
         self._last_boxes[stream_id] = boxes
-        return points
+        self._last_phone_boxes[stream_id] = xywh_boxes(phones)
+        return detections_from_boxes(boxes, has_phone)
 
-    def _detect_people_yolo(self, stream_id: str, frame) -> List[Tuple[float, float]]:
-        boxes: List[Tuple[int, int, int, int]] = []
-        points: List[Tuple[float, float]] = []
+    def _infer(self, frame) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        # One forward pass for people and phones; phones use their own (lower) confidence.
+        if self._service is not None:
+            try:
+                xyxy, cls, conf = self._service.infer(frame)
+            except RuntimeError as exc:
+                if self._service_ok:
+                    print(f"vision: {exc}; no detections until it is back")
+                self._service_ok = False
+                return np.empty((0, 4), np.float32), np.empty(0, np.int32), np.empty(0, np.float32)
+            if not self._service_ok:
+                print("vision: inference service reconnected")
+            self._service_ok = True
+            return xyxy, cls, conf
 
-        results = self._yolo(frame, conf=self.conf, iou=self.iou, verbose=False)
+        results = self._yolo(
+            frame,
+            conf=min(self.conf, self.phone_conf),
+            iou=self.iou,
+            classes=[self.person_class, self.phone_class],
+            verbose=False,
+        )
         if not results:
-            self._last_boxes[stream_id] = []
-            return []
+            return np.empty((0, 4), np.float32), np.empty(0, np.int32), np.empty(0, np.float32)
+        boxes = results[0].boxes
+        return (
+            boxes.xyxy.cpu().numpy().astype(np.float32),
+            boxes.cls.cpu().numpy().astype(np.int32),
+            boxes.conf.cpu().numpy(),
+        )
 
-        res = results[0]
-        for box in res.boxes:
-            cls = int(box.cls.item())
-            if cls != 0:
-                continue
-            x1, y1, x2, y2 = box.xyxy[0].tolist()
-            x = int(max(0, x1))
-            y = int(max(0, y1))
-            w = int(max(0, x2 - x1))
-            h = int(max(0, y2 - y1))
-            boxes.append((x, y, w, h))
-            cx = x + w / 2.0
-            cy = y + h / 2.0
-            points.append((cx, cy))
+    def _update_tracks(self, tracks: TrackTable, detections: Detections, ts: float) -> TrackTable:
+        n_tracks = len(tracks)
+        n_dets = len(detections)
+        if n_dets == 0:
+            # Between detections only lost tracks change.
+            keep = (ts - tracks.last_seen) <= self.max_lost_s
+            if keep.all():
+                return tracks
+            return TrackTable(**{name: getattr(tracks, name)[keep] for name in TrackTable.COLUMNS})
+        pos = detections.positions.astype(np.float64)
 
-        self._last_boxes[stream_id] = boxes
-        return points
-
-    def _update_tracks(self, tracks: Dict[int, TrackData], detections: List[Tuple[float, float]], ts: float) -> None:
-        unmatched = set(tracks.keys())
-        assigned: Dict[int, Tuple[float, float]] = {}
-
-        for det in detections:
-            best_id = None
-            best_dist = self.distance_threshold
-            for track_id, track in tracks.items():
-                dx = det[0] - track.last_position[0]
-                dy = det[1] - track.last_position[1]
-                dist = math.hypot(dx, dy)
-                if dist < best_dist:
-                    best_dist = dist
-                    best_id = track_id
-            if best_id is not None:
-                assigned[best_id] = det
-                if best_id in unmatched:
-                    unmatched.remove(best_id)
-
-        for track_id, pos in assigned.items():
-            track = tracks[track_id]
-            dt = max(1e-3, ts - track.last_time)
-            dist = math.hypot(pos[0] - track.last_position[0], pos[1] - track.last_position[1])
-            velocity = dist / dt
-            velocity_ema = (self.ema_alpha * velocity) + ((1.0 - self.ema_alpha) * track.velocity_ema)
-            stationary = velocity_ema < self.stationary_threshold
-            track.state.position = pos
-            track.state.velocity = velocity_ema
-            track.state.stationary = stationary
-            track.state.last_seen = ts
-            track.last_position = pos
-            track.last_time = ts
-            track.velocity_ema = velocity_ema
-
-        for track_id in list(unmatched):
-            track = tracks[track_id]
-            if (ts - track.state.last_seen) > self.max_lost_s:
-                tracks.pop(track_id, None)
-
-        for det in detections:
-            if det in assigned.values():
-                continue
-            track_id = self._next_track_id
-            self._next_track_id += 1
-            state = PersonState(
-                track_id=track_id,
-                position=det,
-                velocity=0.0,
-                stationary=True,
-                has_phone=False,
-                last_seen=ts,
-            )
-            tracks[track_id] = TrackData(
-                state=state,
-                last_position=det,
-                last_time=ts,
-                velocity_ema=0.0,
+        # Each detection picks its nearest track under distance_threshold; if several pick the same
+        # track the last one wins and the others start new tracks.
+        owner = np.full(n_tracks, -1, dtype=np.int64)
+        if n_tracks and n_dets:
+            dist = np.hypot(pos[:, 0:1] - tracks.x[None, :], pos[:, 1:2] - tracks.y[None, :])
+            best = dist.argmin(axis=1)
+            valid = np.flatnonzero(dist[np.arange(n_dets), best] < self.distance_threshold)
+            np.maximum.at(owner, best[valid], valid)
+        matched = np.flatnonzero(owner >= 0)
+        det = owner[matched]
+
+        x = tracks.x.copy()
+        y = tracks.y.copy()
+        foot_y = tracks.foot_y.copy()
+        velocity = tracks.velocity.copy()
+        phone_ema = tracks.phone_ema.copy()
+        last_seen = tracks.last_seen.copy()
+        if len(matched):
+            dt = np.maximum(1e-3, ts - last_seen[matched])
+            moved = np.hypot(pos[det, 0] - x[matched], pos[det, 1] - y[matched])
+            velocity[matched] = self.ema_alpha * (moved / dt) + (1.0 - self.ema_alpha) * velocity[matched]
+            phone_ema[matched] = (
+                self.phone_ema_alpha * detections.has_phone[det] + (1.0 - self.phone_ema_alpha) * phone_ema[matched]
             )
+            x[matched] = pos[det, 0]
+            y[matched] = pos[det, 1]
+            foot_y[matched] = detections.foot_y[det]
+            last_seen[matched] = ts
+        stationary = tracks.stationary.copy()
+        has_phone = tracks.has_phone.copy()
+        stationary[matched] = velocity[matched] < self.stationary_threshold
+        has_phone[matched] = phone_ema[matched] >= self.phone_threshold
+
+        keep = (owner >= 0) | ((ts - tracks.last_seen) <= self.max_lost_s)
+        new = np.ones(n_dets, dtype=bool)
+        new[det] = False
+        n_new = int(new.sum())
+        new_phone = (self.phone_ema_alpha * detections.has_phone[new]).astype(np.float32)
+
+        track_id = np.arange(self._next_track_id, self._next_track_id + n_new, dtype=np.int64)
+        self._next_track_id += n_new
+        return TrackTable(
+            track_id=np.concatenate([tracks.track_id[keep], track_id]),
+            x=np.concatenate([x[keep], pos[new, 0].astype(np.float32)]),
+            y=np.concatenate([y[keep], pos[new, 1].astype(np.float32)]),
+            foot_y=np.concatenate([foot_y[keep], detections.foot_y[new]]),
+            velocity=np.concatenate([velocity[keep], np.zeros(n_new, np.float32)]),
+            stationary=np.concatenate([stationary[keep], np.ones(n_new, np.bool_)]),
+            has_phone=np.concatenate([has_phone[keep], new_phone >= self.phone_threshold]),
+            last_seen=np.concatenate([last_seen[keep], np.full(n_new, ts)]),
+            phone_ema=np.concatenate([phone_ema[keep], new_phone]),
+        )
+
+
+def detections_from_boxes(boxes: np.ndarray, has_phone: np.ndarray) -> Detections:
+    # Tracking uses the box centre; the bottom edge is kept for projecting people onto the floor.
+    return Detections(
+        positions=(boxes[:, :2] + boxes[:, 2:] / 2.0).astype(np.float32),
+        foot_y=(boxes[:, 1] + boxes[:, 3]).astype(np.float32),
+        has_phone=has_phone,
+    )
+
+
+def xywh_boxes(xyxy: np.ndarray) -> np.ndarray:
+    # (N, 4) x1, y1, x2, y2 floats -> integer x, y, w, h clamped at 0, as drawn in the preview.
+    boxes = np.empty((len(xyxy), 4), dtype=np.int32)
+    boxes[:, :2] = np.maximum(0, xyxy[:, :2])
+    boxes[:, 2:] = np.maximum(0, xyxy[:, 2:] - xyxy[:, :2])
+    return boxes
+
+
+def associate_phones(
+    people: np.ndarray,
+    phones: np.ndarray,
+    upper_ratio: float = 0.6,
+    min_overlap: float = 0.5,
+) -> np.ndarray:
+    # Each phone goes to the person whose upper-body box covers most of it.
+    holding = np.zeros(len(people), dtype=bool)
+    if len(people) == 0 or len(phones) == 0:
+        return holding
+
+    px1, py1, px2, py2 = (people[:, i:i + 1] for i in range(4))
+    py2 = py1 + (py2 - py1) * upper_ratio
+    qx1, qy1, qx2, qy2 = (phones[:, i] for i in range(4))
+
+    iw = np.clip(np.minimum(px2, qx2) - np.maximum(px1, qx1), 0.0, None)
+    ih = np.clip(np.minimum(py2, qy2) - np.maximum(py1, qy1), 0.0, None)
+    phone_area = np.maximum((qx2 - qx1) * (qy2 - qy1), 1e-6)
+    overlap = (iw * ih) / phone_area
+
+    best = overlap.argmax(axis=0)
+    hit = overlap[best, np.arange(len(phones))] >= min_overlap
+    holding[best[hit]] = True
+    return holding
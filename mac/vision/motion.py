@@ -0,0 +1,102 @@
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+
+Box = Tuple[int, int, int, int]
+
+
+@dataclass
+class MotionResult:
+    boxes: List[Box]
+    energy: float  # fraction of the unmasked view that changed, 0..1
+
+
+def parse_masks(config: dict) -> Dict[str, List[np.ndarray]]:
+    # stream id -> normalized shapes: [x0, y0, x1, y1] rects or [[x, y], ...] polygons.
+    masks: Dict[str, List[np.ndarray]] = {}
+    for stream_id, shapes in (config or {}).items():
+        polygons = []
+        for shape in shapes or []:
+            pts = np.asarray(shape, dtype=np.float32)
+            if pts.shape == (4,):
+                x0, y0, x1, y1 = pts
+                if x0 >= x1 or y0 >= y1:
+                    raise ValueError(f"motion mask for {stream_id}: rect must be [x0, y0, x1, y1] with x0<x1, y0<y1")
+                pts = np.array([[x0, y0], [x1, y0], [x1, y1], [x0, y1]], dtype=np.float32)
+            elif pts.ndim != 2 or pts.shape[1] != 2 or len(pts) < 3:
+                raise ValueError(f"motion mask for {stream_id}: expected a rect or a polygon of 3+ [x, y] points")
+            polygons.append(pts)
+        masks[str(stream_id)] = polygons
+    return masks
+
+
+class MotionDetector:
+    # Per-stream background subtraction on a downscaled grayscale frame; blobs are reported at full resolution.
+    def __init__(
+        self,
+        width: int = 320,
+        history: int = 200,
+        min_area: int = 800,
+        ignore: Sequence[np.ndarray] = (),
+    ):
+        self.width = width
+        self.history = history
+        self.min_area = min_area
+        self.ignore = list(ignore)
+        self._bg = cv2.createBackgroundSubtractorMOG2(history=history, detectShadows=False)
+        self._frame_shape: Optional[Tuple[int, int]] = None
+        self._small: Tuple[int, int] = (0, 0)
+        self._scale = 1.0
+        self._mask: Optional[np.ndarray] = None
+        self._active_pixels = 1
+        self._kernel = np.ones((3, 3), np.uint8)
+
+    def detect(self, frame: np.ndarray) -> MotionResult:
+        h, w = frame.shape[:2]
+        if self._frame_shape != (h, w):
+            self._setup(w, h)
+
+        small = frame
+        if self._scale != 1.0:
+            small = cv2.resize(frame, self._small, interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+
+        fg = self._bg.apply(small)
+        if self._mask is not None:
+            cv2.bitwise_and(fg, self._mask, dst=fg)
+        fg = cv2.medianBlur(fg, 3)
+        _, th = cv2.threshold(fg, 200, 255, cv2.THRESH_BINARY)
+        energy = cv2.countNonZero(th) / self._active_pixels
+        th = cv2.dilate(th, self._kernel, iterations=2)
+        contours, _ = cv2.findContours(th, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+        boxes: List[Box] = []
+        min_area = self.min_area * self._scale * self._scale
+        inv = 1.0 / self._scale
+        for c in contours:
+            if cv2.contourArea(c) < min_area:
+                continue
+            x, y, bw, bh = cv2.boundingRect(c)
+            boxes.append((int(x * inv), int(y * inv), int(bw * inv), int(bh * inv)))
+        return MotionResult(boxes=boxes, energy=float(energy))
+
+    def _setup(self, w: int, h: int) -> None:
+        # A new frame size means a new camera mode: the learned background no longer applies.
+        if self._frame_shape is not None:
+            self._bg = cv2.createBackgroundSubtractorMOG2(history=self.history, detectShadows=False)
+        self._frame_shape = (h, w)
+        self._scale = min(1.0, self.width / float(w))
+        self._small = (max(1, int(round(w * self._scale))), max(1, int(round(h * self._scale))))
+
+        self._mask = None
+        self._active_pixels = self._small[0] * self._small[1]
+        if self.ignore:
+            mask = np.full((self._small[1], self._small[0]), 255, np.uint8)
+            size = np.array(self._small, dtype=np.float32)
+            cv2.fillPoly(mask, [np.round(p * size).astype(np.int32) for p in self.ignore], 0)
+            self._mask = mask
+            self._active_pixels = max(1, cv2.countNonZero(mask))
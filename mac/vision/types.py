@@ -1,5 +1,7 @@
-from dataclasses import dataclass
-from typing import Tuple
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
 
 
 @dataclass
@@ -10,3 +12,118 @@ class PersonState:
     stationary: bool
     has_phone: bool
     last_seen: float
+
+
+def _empty(dtype) -> np.ndarray:
+    return np.empty(0, dtype=dtype)
+
+
+@dataclass
+class PersonBatch:
+    # Columnar people from every stream in one tick; `stream` indexes into `streams`.
+    streams: List[str] = field(default_factory=list)
+    track_id: np.ndarray = field(default_factory=lambda: _empty(np.int64))
+    x: np.ndarray = field(default_factory=lambda: _empty(np.float32))
+    y: np.ndarray = field(default_factory=lambda: _empty(np.float32))
+    foot_y: np.ndarray = field(default_factory=lambda: _empty(np.float32))  # bottom edge of the box, where the floor is
+    velocity: np.ndarray = field(default_factory=lambda: _empty(np.float32))
+    stationary: np.ndarray = field(default_factory=lambda: _empty(np.bool_))
+    has_phone: np.ndarray = field(default_factory=lambda: _empty(np.bool_))
+    last_seen: np.ndarray = field(default_factory=lambda: _empty(np.float64))
+    stream: np.ndarray = field(default_factory=lambda: _empty(np.int32))
+
+    COLUMNS = ("track_id", "x", "y", "foot_y", "velocity", "stationary", "has_phone", "last_seen", "stream")
+    # Bits of the packed per-person flags byte (remote batches, telemetry records).
+    FLAG_STATIONARY = 0x01
+    FLAG_PHONE = 0x02
+
+    def __len__(self) -> int:
+        return len(self.track_id)
+
+    @classmethod
+    def build(cls, streams: List[str], states: Sequence[PersonState], stream_index: Sequence[int]) -> "PersonBatch":
+        n = len(states)
+        return cls(
+            streams=list(streams),
+            track_id=np.fromiter((p.track_id for p in states), np.int64, n),
+            x=np.fromiter((p.position[0] for p in states), np.float32, n),
+            y=np.fromiter((p.position[1] for p in states), np.float32, n),
+            foot_y=np.fromiter((p.position[1] for p in states), np.float32, n),
+            velocity=np.fromiter((p.velocity for p in states), np.float32, n),
+            stationary=np.fromiter((p.stationary for p in states), np.bool_, n),
+            has_phone=np.fromiter((p.has_phone for p in states), np.bool_, n),
+            last_seen=np.fromiter((p.last_seen for p in states), np.float64, n),
+            stream=np.asarray(stream_index, dtype=np.int32).reshape(n),
+        )
+
+    @classmethod
+    def from_states(cls, results: Dict[str, List[PersonState]]) -> "PersonBatch":
+        streams = list(results.keys())
+        states: List[PersonState] = []
+        stream_index: List[int] = []
+        for i, people in enumerate(results.values()):
+            states.extend(people)
+            stream_index.extend([i] * len(people))
+        return cls.build(streams, states, stream_index)
+
+    @classmethod
+    def concat(cls, batches: Iterable["PersonBatch"]) -> "PersonBatch":
+        batches = list(batches)
+        streams: List[str] = []
+        lookup: Dict[str, int] = {}
+        remapped: List[np.ndarray] = []
+        for b in batches:
+            mapping = np.empty(len(b.streams), dtype=np.int32)
+            for i, name in enumerate(b.streams):
+                if name not in lookup:
+                    lookup[name] = len(streams)
+                    streams.append(name)
+                mapping[i] = lookup[name]
+            remapped.append(mapping[b.stream] if len(b) else _empty(np.int32))
+        if not batches:
+            return cls()
+        columns = {
+            name: np.concatenate([getattr(b, name) for b in batches])
+            for name in cls.COLUMNS
+            if name != "stream"
+        }
+        return cls(streams=streams, stream=np.concatenate(remapped), **columns)
+
+    def select(self, mask: np.ndarray) -> "PersonBatch":
+        return PersonBatch(streams=self.streams, **{name: getattr(self, name)[mask] for name in self.COLUMNS})
+
+    def stream_counts(self) -> Dict[str, int]:
+        counts = np.bincount(self.stream, minlength=len(self.streams))
+        return dict(zip(self.streams, counts.tolist()))
+
+    def flags(self) -> np.ndarray:
+        return (self.stationary * self.FLAG_STATIONARY | self.has_phone * self.FLAG_PHONE).astype(np.uint8)
+
+    def positions(self) -> np.ndarray:
+        return np.stack([self.x, self.y], axis=1)
+
+    def to_states(self) -> Dict[str, List[PersonState]]:
+        # Compatibility view for code that still wants per-person dataclasses.
+        results: Dict[str, List[PersonState]] = {name: [] for name in self.streams}
+        rows = zip(
+            self.track_id.tolist(),
+            self.x.tolist(),
+            self.y.tolist(),
+            self.velocity.tolist(),
+            self.stationary.tolist(),
+            self.has_phone.tolist(),
+            self.last_seen.tolist(),
+            self.stream.tolist(),
+        )
+        for track_id, x, y, velocity, stationary, has_phone, last_seen, idx in rows:
+            results[self.streams[idx]].append(
+                PersonState(
+                    track_id=track_id,
+                    position=(x, y),
+                    velocity=velocity,
+                    stationary=stationary,
+                    has_phone=has_phone,
+                    last_seen=last_seen,
+                )
+            )
+        return results
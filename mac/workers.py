@@ -0,0 +1,19 @@
+import threading
+from typing import Callable, List
+
+
+class WorkerThreads:
+    # Daemon threads owned by a server; finished ones are pruned whenever a new one starts.
+    def __init__(self):
+        self._threads: List[threading.Thread] = []
+
+    def spawn(self, target: Callable[..., None], name: str, *args) -> None:
+        thread = threading.Thread(target=target, args=args, name=name, daemon=True)
+        self._threads = [t for t in self._threads if t.is_alive()]
+        self._threads.append(thread)
+        thread.start()
+
+    def join(self, timeout: float) -> None:
+        for thread in self._threads:
+            thread.join(timeout=timeout)
+        self._threads = []
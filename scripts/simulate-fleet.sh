@@ -0,0 +1,13 @@
+#!/bin/bash
+set -euo pipefail
+
+VENV_DIR="${VENV_DIR:-.venv}"
+
+if [[ ! -d "${VENV_DIR}" ]]; then
+  echo "Venv not found at ${VENV_DIR}. Run: ./scripts/setup-venv.sh --python python3.12"
+  exit 1
+fi
+
+source "${VENV_DIR}/bin/activate"
+
+exec python3 mac/sim/fleet.py "$@"